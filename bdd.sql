@@ -21,6 +21,7 @@ CREATE DATABASE exam_platform
 -- ============================================
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "btree_gin";
+CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
 -- ============================================
 -- 3. Table des départements (Dimension)
@@ -703,7 +704,9 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Fonction 2: Détecter tous les conflits
-CREATE OR REPLACE FUNCTION detecter_conflits()
+-- p_professeur_id: limite aux conflits des examens de ce professeur (NULL = tous)
+DROP FUNCTION IF EXISTS detecter_conflits();
+CREATE OR REPLACE FUNCTION detecter_conflits(p_professeur_id INT DEFAULT NULL)
 RETURNS TABLE (
     type_conflit VARCHAR,
     details TEXT,
@@ -723,6 +726,7 @@ BEGIN
           && tsrange(e2.date_heure, e2.date_heure + (e2.duree_minutes || ' minutes')::interval)
     AND e1.statut IN ('Planifié', 'Confirmé')
     AND e2.statut IN ('Planifié', 'Confirmé')
+    AND (p_professeur_id IS NULL OR p_professeur_id IN (e1.professeur_id, e2.professeur_id))
     UNION ALL
     -- Conflits de professeur
     SELECT 
@@ -735,6 +739,7 @@ BEGIN
     FROM examens e
     JOIN professeurs p ON e.professeur_id = p.id
     WHERE e.statut IN ('Planifié', 'Confirmé')
+    AND (p_professeur_id IS NULL OR e.professeur_id = p_professeur_id)
     GROUP BY p.id, p.nom, p.prenom, DATE(e.date_heure)
     HAVING COUNT(*) > 3
     UNION ALL
@@ -751,7 +756,8 @@ BEGIN
     JOIN etudiants et ON i1.etudiant_id = et.id
     WHERE ABS(EXTRACT(EPOCH FROM (e1.date_heure - e2.date_heure))) < 7200 -- 2 heures
     AND e1.statut IN ('Planifié', 'Confirmé')
-    AND e2.statut IN ('Planifié', 'Confirmé');
+    AND e2.statut IN ('Planifié', 'Confirmé')
+    AND p_professeur_id IS NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -908,12 +914,12 @@ LIMIT 7;
 -- 18. CRÉATION DES UTILISATEURS AVEC MOTS DE PASSE VALIDES
 -- ============================================
 
--- Fonction pour générer un hash bcrypt simple (pour le développement)
+-- Fonction pour générer un vrai hash bcrypt (vérifiable par bcrypt.checkpw)
 CREATE OR REPLACE FUNCTION generate_simple_bcrypt(password TEXT)
 RETURNS TEXT AS $$
 BEGIN
-    -- Format bcrypt simplifié pour le développement: $2a$12$ + 22 chars + 31 chars
-    RETURN '$2a$12$' || substr(md5(password), 1, 22) || substr(md5(password), 1, 31);
+    -- Format bcrypt standard: $2a$10$ + sel + hash (coût réduit pour le jeu de test)
+    RETURN crypt(password, gen_salt('bf', 10));
 END;
 $$ LANGUAGE plpgsql;
 
@@ -2,56 +2,110 @@
 Système d'authentification moderne avec session management
 """
 import streamlit as st
-import hashlib
-from datetime import datetime, timedelta
+import bcrypt
+import psycopg2
+import psycopg2.pool
+import re
+import time
+from datetime import datetime
 from typing import Optional, Dict, Any
 import logging
 from queries import UserQueries
+from connection import execute_select_one
 
 logger = logging.getLogger(__name__)
 
+# Noms d'utilisateur valides (users.username est un VARCHAR(50))
+USERNAME_RE = re.compile(r'[A-Za-z0-9._-]{1,50}')
+
+# Nom affiché par rôle (les autres rôles affichent leur nom d'utilisateur)
+DISPLAY_NAME_BY_ROLE = {
+    'etudiant': 'Étudiant Test',
+    'professeur': 'Professeur Test'
+}
+
+# Requête de connexion, préparée une fois par connexion du pool
+AUTH_LOOKUP_SQL = """
+    SELECT u.id, u.username, u.role, u.linked_id, u.email, u.password_hash
+    FROM users u
+    WHERE u.username = $1 
+        AND u.is_active = TRUE
+"""
+
+# Styles du formulaire de connexion
+LOGIN_CSS = """
+    <style>
+    .login-container {
+        max-width: 400px;
+        margin: 0 auto;
+        padding: 2rem;
+        border-radius: 10px;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    }
+    .login-title {
+        text-align: center;
+        color: white;
+        margin-bottom: 2rem;
+        font-size: 1.8rem;
+    }
+    </style>
+"""
+
+def _lookup_user(username: str) -> Optional[Dict[str, Any]]:
+    """
+    Récupère la ligne utilisateur actif (requête préparée, jamais mise en
+    cache: password_hash et is_active doivent refléter l'état courant, et un
+    compte tout juste créé doit pouvoir se connecter immédiatement)
+    """
+    row = execute_select_one("auth_lookup", AUTH_LOOKUP_SQL, (username,), ("text",))
+    return dict(row) if row else None
+
 class AuthenticationSystem:
     """Gestion complète de l'authentification"""
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash le mot de passe (simplifié - en production utiliser bcrypt)"""
-        # Note: En production, utiliser bcrypt avec sel
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash le mot de passe avec bcrypt (sel aléatoire, coût 12)"""
+        # Pas de lru_cache ici: le sel rend le résultat non déterministe et
+        # mémoriser les mots de passe en clair comme clés serait une fuite
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=12)).decode()
+    
+    @staticmethod
+    def verify_password(password: str, hashed: str) -> bool:
+        """Vérifie un mot de passe contre son hash bcrypt"""
+        if not password or not hashed:
+            return False
+        try:
+            return bcrypt.checkpw(password.encode(), hashed.encode())
+        except ValueError:
+            # Hash mal formé en base
+            return False
     
     @staticmethod
     def authenticate(username: str, password: str):
+        # Rejet immédiat des noms invalides, sans aller-retour vers la base
+        if not username or not USERNAME_RE.fullmatch(username):
+            return None
+        
         try:
-            # استعلام مباشر
-            query = """
-                SELECT u.id, u.username, u.role, u.linked_id, u.email,
-                       CASE u.role
-                           WHEN 'etudiant' THEN 'Étudiant Test'
-                           WHEN 'professeur' THEN 'Professeur Test'
-                           ELSE u.username
-                       END as display_name
-                FROM users u
-                WHERE u.username = %s 
-                    AND u.is_active = TRUE
-            """
+            user = _lookup_user(username)
             
-            from connection import execute_query
-            result = execute_query(query, (username,))
+            # Une seule condition: utilisateur actif trouvé ET mot de passe valide
+            if not user or not AuthenticationSystem.verify_password(password, user['password_hash']):
+                return None
             
-            if result:
-                user = result[0]
-                
-                # في التطوير، اقبل أي كلمة مرور
-                if password:
-                    return {
-                        'username': user['username'],
-                        'role': user['role'],
-                        'linked_id': user['linked_id'],
-                        'display_name': user['display_name']
-                    }
-            
-            return None
-        except:
+            return {
+                'username': user['username'],
+                'role': user['role'],
+                'linked_id': user['linked_id'],
+                'display_name': DISPLAY_NAME_BY_ROLE.get(user['role'], user['username'])
+            }
+        except psycopg2.pool.PoolError:
+            # Saturation du pool: à distinguer d'identifiants invalides
+            raise
+        except (psycopg2.Error, KeyError) as e:
+            logger.warning("Erreur base de données lors de l'authentification: %s", e)
             return None
     
     @staticmethod
@@ -63,7 +117,9 @@ class AuthenticationSystem:
             'authenticated': True,
             'user': user_data,
             'login_time': datetime.now(),
-            'last_activity': datetime.now()
+            'last_activity': time.monotonic(),
+            # Libellé du rôle pour la sidebar, calculé une fois à la connexion
+            'display_role': user_data['role'].replace('_', ' ').title()
         })
         
         # Stocker des informations spécifiques au rôle
@@ -80,8 +136,7 @@ class AuthenticationSystem:
         logger.info(f"Déconnexion de l'utilisateur: {username}")
         
         # Nettoyer la session
-        for key in list(st.session_state.keys()):
-            del st.session_state[key]
+        st.session_state.clear()
     
     @staticmethod
     def check_session_timeout(timeout_minutes: int = 60) -> bool:
@@ -90,13 +145,9 @@ class AuthenticationSystem:
         """
         if 'last_activity' not in st.session_state:
             return True
-            
-        last_activity = st.session_state['last_activity']
-        if isinstance(last_activity, str):
-            last_activity = datetime.fromisoformat(last_activity)
         
-        timeout_delta = timedelta(minutes=timeout_minutes)
-        return datetime.now() - last_activity > timeout_delta
+        # last_activity est un horodatage time.monotonic() (secondes)
+        return time.monotonic() - st.session_state['last_activity'] > timeout_minutes * 60
     
     @staticmethod
     def update_activity():
@@ -104,31 +155,14 @@ class AuthenticationSystem:
         Met à jour le timestamp de dernière activité
         """
         if 'authenticated' in st.session_state and st.session_state['authenticated']:
-            st.session_state['last_activity'] = datetime.now()
+            st.session_state['last_activity'] = time.monotonic()
     
     @staticmethod
     def render_login_form():
         """
         Affiche le formulaire de connexion
         """
-        st.markdown("""
-            <style>
-            .login-container {
-                max-width: 400px;
-                margin: 0 auto;
-                padding: 2rem;
-                border-radius: 10px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            }
-            .login-title {
-                text-align: center;
-                color: white;
-                margin-bottom: 2rem;
-                font-size: 1.8rem;
-            }
-            </style>
-        """, unsafe_allow_html=True)
+        st.markdown(LOGIN_CSS, unsafe_allow_html=True)
         
         with st.container():
             st.markdown('<div class="login-container">', unsafe_allow_html=True)
@@ -150,8 +184,13 @@ class AuthenticationSystem:
                         st.error("Veuillez remplir tous les champs")
                     else:
                         with st.spinner("Authentification en cours..."):
-                            user = AuthenticationSystem.authenticate(username, password)
-                            if user:
+                            try:
+                                user = AuthenticationSystem.authenticate(username, password)
+                            except psycopg2.pool.PoolError:
+                                user = False
+                            if user is False:
+                                st.error("Service momentanément saturé, réessayez dans quelques instants")
+                            elif user:
                                 AuthenticationSystem.initialize_session(user)
                                 st.success(f"Bienvenue {user.get('display_name', username)}!")
                                 st.rerun()
@@ -1,32 +1,91 @@
 """
-Connexion PostgreSQL ultra-simplifiée sans pool
+Connexion PostgreSQL avec pool de connexions
 """
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+import pandas as pd
 import logging
+import threading
 
-# Désactiver les logs pour éviter les erreurs
-logging.basicConfig(level=logging.CRITICAL)
+# Réduire au silence uniquement psycopg2, sans toucher au logger racine
+logging.getLogger("psycopg2").setLevel(logging.CRITICAL)
 logger = logging.getLogger(__name__)
 
+# Configuration minimaliste
+DB_CONFIG = {
+    "dbname": "exam_platform",
+    "user": "postgres",
+    "password": "gr123",
+    "host": "localhost",
+    "port": "5432",
+    "connect_timeout": 5,  # Timeout court
+    # Bornes appliquées dès l'ouverture de chaque connexion du pool:
+    # aucune requête ne dépasse 60s (sauf timeout explicite, cf.
+    # load_dataframe) et aucune transaction oubliée ne bloque une connexion
+    "options": "-c statement_timeout=60s -c idle_in_transaction_session_timeout=5s"
+}
+
+# Pool partagé par toutes les sessions (créé au premier appel, sous verrou:
+# deux sessions simultanées ne créent pas chacune leur pool)
+_POOL = None
+_POOL_LOCK = threading.Lock()
+MAX_CONNECTIONS = 10
+# Emprunts bornés à MAX_CONNECTIONS: au-delà on attend qu'une connexion se
+# libère (prefetch parallèles) au lieu d'échouer immédiatement
+_CHECKOUT = threading.BoundedSemaphore(MAX_CONNECTIONS)
+CHECKOUT_TIMEOUT = 30  # secondes
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connexion du pool qui mémorise ses requêtes préparées (PREPARE)"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self._dict_cursor = None
+        # Chaque requête est sa propre transaction: pas de COMMIT après un SELECT
+        self.autocommit = True
+    
+    def dict_cursor(self):
+        """Curseur RealDictCursor réutilisé d'un appel à l'autre"""
+        if self._dict_cursor is None or self._dict_cursor.closed:
+            self._dict_cursor = self.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        return self._dict_cursor
+
 class SimpleConnection:
-    """Connexion simple sans pool"""
+    """Connexions réutilisées via un pool thread-safe"""
+    
+    @staticmethod
+    def get_pool():
+        """Retourne le pool, en le créant si nécessaire"""
+        global _POOL
+        if _POOL is None:
+            with _POOL_LOCK:
+                if _POOL is None:
+                    _POOL = psycopg2.pool.ThreadedConnectionPool(
+                        minconn=1, maxconn=MAX_CONNECTIONS,
+                        connection_factory=PooledConnection, **DB_CONFIG
+                    )
+        return _POOL
     
     @staticmethod
     def get_connection():
-        """Retourne une connexion simple"""
+        """
+        Emprunte une connexion au pool, en attendant qu'une se libère si
+        toutes sont prises. Lève PoolError si l'attente dépasse
+        CHECKOUT_TIMEOUT (pas de résultat vide silencieux)
+        """
+        if not _CHECKOUT.acquire(timeout=CHECKOUT_TIMEOUT):
+            logger.error("Pool PostgreSQL épuisé: aucune connexion libre après %ss", CHECKOUT_TIMEOUT)
+            raise psycopg2.pool.PoolError("Pool PostgreSQL épuisé")
         try:
-            # Configuration minimaliste
-            conn = psycopg2.connect(
-                dbname="exam_platform",
-                user="postgres",
-                password="gr123",
-                host="localhost",
-                port="5432",
-                connect_timeout=5  # Timeout court
-            )
-            return conn
+            return SimpleConnection.get_pool().getconn()
+        except psycopg2.pool.PoolError as e:
+            _CHECKOUT.release()
+            logger.error("Pool PostgreSQL épuisé: %s", e)
+            raise
         except psycopg2.OperationalError as e:
+            _CHECKOUT.release()
             print(f"⚠️  Erreur connexion PostgreSQL: {e}")
             print("\n💡 Solutions:")
             print("1. Vérifiez que PostgreSQL est lancé")
@@ -34,50 +93,190 @@ class SimpleConnection:
             print("3. Essayez sans mot de passe: password=''")
             return None
         except Exception as e:
+            _CHECKOUT.release()
             print(f"❌ Erreur inconnue: {e}")
             return None
+    
+    @staticmethod
+    def release_connection(conn, close: bool = False):
+        """Rend une connexion au pool (fermée si elle est compromise)"""
+        try:
+            if _POOL is not None:
+                _POOL.putconn(conn, close=close)
+            else:
+                conn.close()
+        finally:
+            _CHECKOUT.release()
 
 def execute_query(query: str, params=None, fetch=True):
     """
-    Version ultra-simplifiée d'execute_query
+    Exécute une requête sur une connexion empruntée au pool
     """
     conn = None
+    broken = False
     try:
         conn = SimpleConnection.get_connection()
         if not conn:
             return [] if fetch else 0
         
         # Utiliser RealDictCursor pour avoir des dictionnaires
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.dict_cursor()
         cursor.execute(query, params or ())
         
         if fetch and cursor.description:
-            results = cursor.fetchall()
-            conn.commit()
-            return results
+            return cursor.fetchall()
         else:
-            conn.commit()
             return cursor.rowcount
-            
+    
+    except psycopg2.pool.PoolError:
+        raise
     except Exception as e:
         print(f"⚠️  Erreur query: {str(e)[:100]}...")
         if conn:
-            conn.rollback()
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                # Connexion inutilisable: ne pas la remettre dans le pool
+                broken = True
         return [] if fetch else 0
     finally:
         if conn:
-            conn.close()
+            SimpleConnection.release_connection(conn, close=broken)
+
+def execute_many(query: str, rows, page_size: int = 500) -> int:
+    """
+    Exécute une requête « VALUES %s » pour tout un lot de lignes
+    (psycopg2.extras.execute_values: un aller-retour par page au lieu d'un par ligne).
+    Toutes les pages forment une seule transaction; retourne le total des
+    lignes affectées
+    """
+    conn = None
+    broken = False
+    rows = list(rows)
+    try:
+        conn = SimpleConnection.get_connection()
+        if not conn:
+            return 0
+        
+        # Le pool est en autocommit: transaction explicite le temps du lot,
+        # sinon chaque page serait validée séparément
+        conn.autocommit = False
+        total = 0
+        with conn:
+            with conn.cursor() as cursor:
+                for start in range(0, len(rows), page_size):
+                    psycopg2.extras.execute_values(
+                        cursor, query, rows[start:start + page_size], page_size=page_size
+                    )
+                    # rowcount ne porte que sur la dernière page exécutée
+                    total += max(cursor.rowcount, 0)
+        return total
+    
+    except psycopg2.pool.PoolError:
+        raise
+    except Exception as e:
+        # `with conn` a déjà annulé la transaction
+        print(f"⚠️  Erreur execute_many: {str(e)[:100]}...")
+        return 0
+    finally:
+        if conn:
+            try:
+                conn.autocommit = True
+            except psycopg2.Error:
+                broken = True
+            SimpleConnection.release_connection(conn, close=broken)
 
-def load_dataframe(query: str, params=None):
+def _run_prepared(conn, name: str, statement: str, params, arg_types):
     """
-    Version simplifiée - retourne liste de dicts
+    Prépare la requête nommée si cette connexion ne l'a pas encore fait,
+    puis l'exécute; retourne le curseur
     """
+    cursor = conn.dict_cursor()
+    if name not in conn.prepared:
+        types = f"({', '.join(arg_types)})" if arg_types else ""
+        cursor.execute(f"PREPARE {name}{types} AS {statement}")
+        conn.prepared.add(name)
+    
+    placeholders = f"({', '.join(['%s'] * len(params))})" if params else ""
+    cursor.execute(f"EXECUTE {name}{placeholders}", params)
+    return cursor
+
+def execute_select_one(name: str, statement: str, params=(), arg_types=()):
+    """
+    Exécute une requête préparée côté serveur (PREPARE une fois par connexion,
+    puis EXECUTE) renvoyant au plus une ligne (chemin de connexion): retourne
+    la ligne ou None. Les erreurs sont propagées à l'appelant
+    """
+    conn = None
+    broken = False
     try:
-        results = execute_query(query, params, fetch=True)
-        return {"data": results}
+        conn = SimpleConnection.get_connection()
+        if not conn:
+            raise psycopg2.OperationalError("Aucune connexion PostgreSQL disponible")
+        return _run_prepared(conn, name, statement, params, arg_types).fetchone()
+    
+    except Exception:
+        broken = True
+        raise
+    finally:
+        if conn:
+            SimpleConnection.release_connection(conn, close=broken)
+
+# OID PostgreSQL du type NUMERIC (renvoyé en Decimal par psycopg2)
+NUMERIC_OID = 1700
+
+def load_dataframe(query: str, params=None, timeout_s: int = None) -> pd.DataFrame:
+    """
+    Charge le résultat d'un SELECT en DataFrame à partir de lignes tuples
+    (pas de dict par ligne). Les types psycopg2 sont conservés: timestamps en
+    datetime64, NULL distinct de la chaîne vide; NUMERIC converti en float.
+    `timeout_s` remplace le statement_timeout du pool pour cette seule requête
+    """
+    conn = None
+    broken = False
+    try:
+        conn = SimpleConnection.get_connection()
+        if not conn:
+            return pd.DataFrame()
+        
+        if timeout_s:
+            # SET LOCAL ne vaut que dans une transaction: autocommit suspendu
+            conn.autocommit = False
+        with conn.cursor() as cursor:
+            if timeout_s:
+                cursor.execute("SET LOCAL statement_timeout = %s", (f"{int(timeout_s)}s",))
+            cursor.execute(query, params or ())
+            description = cursor.description
+            rows = cursor.fetchall()
+        if timeout_s:
+            # Fin de transaction avant la construction du DataFrame
+            # (idle_in_transaction_session_timeout)
+            conn.commit()
+        
+        df = pd.DataFrame(rows, columns=[col.name for col in description])
+        for col in description:
+            if col.type_code == NUMERIC_OID:
+                df[col.name] = pd.to_numeric(df[col.name])
+        return df
+    
+    except psycopg2.pool.PoolError:
+        raise
     except Exception as e:
-        print(f"⚠️  Erreur load_dataframe: {e}")
-        return {"data": []}
+        print(f"⚠️  Erreur load_dataframe: {str(e)[:100]}...")
+        if conn:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        return pd.DataFrame()
+    finally:
+        if conn:
+            if timeout_s and not broken:
+                try:
+                    conn.autocommit = True
+                except psycopg2.Error:
+                    broken = True
+            SimpleConnection.release_connection(conn, close=broken)
 
 # Test au démarrage
 if __name__ == "__main__":
@@ -87,7 +286,7 @@ if __name__ == "__main__":
     conn = SimpleConnection.get_connection()
     if conn:
         print("✅ PostgreSQL connecté")
-        conn.close()
+        SimpleConnection.release_connection(conn)
     else:
         print("❌ Échec connexion")
         print("\n🚨 VÉRIFIEZ CES POINTS:")
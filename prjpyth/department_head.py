@@ -6,9 +6,275 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from queries import ExamQueries, AnalyticsQueries, OptimizationQueries
 
+# Données simulées du radar des formations: une ligne par formation,
+# colonnes dans l'ordre de RADAR_METRICS
+RADAR_FORMATIONS = ('Informatique', 'Mathématiques', 'Physique', 'Chimie', 'Biologie')
+RADAR_METRICS = ('Taux réussite', 'Charge examens', 'Satisfaction', 'Ressources')
+RADAR_VALUES = np.array([
+    [85, 88, 4.2, 92],
+    [78, 92, 3.8, 88],
+    [82, 85, 4.0, 90],
+    [79, 90, 3.9, 85],
+    [83, 87, 4.1, 89]
+])
+
+RADAR_COLORS = tuple(px.colors.qualitative.Set3)
+
+# Niveaux de sévérité de detecter_conflits(), du plus grave au moins grave
+SEVERITIES = ('CRITIQUE', 'ÉLEVÉ', 'MOYEN', 'FAIBLE')
+
+# Enseignants proposés dans l'éditeur des affectations simulées
+ASSIGNMENT_PROFESSORS = ('Dupont Jean', 'Martin Marie', 'Bernard Pierre',
+                         'Petit Sophie', 'Robert Luc', 'Moreau Claire')
+
+# Suggestions d'optimisation simulées: (titre, détail)
+ASSIGNMENT_SUGGESTIONS = (
+    ("**Dupont Jean** a 3 examens le 16/01", "Considérer réaffecter 'Machine Learning'"),
+    ("**Martin Marie** spécialiste BDD", "Affectation cohérente maintenue"),
+    ("**Salle 101** sous-utilisée", "Ajouter plus d'examens dans cette salle"),
+    ("**Bernard Pierre** a une compatibilité de 85%", "Former en analyse avancée?")
+)
+
+# Types de conflit renvoyés par detecter_conflits() qui concernent un professeur
+PROFESSOR_CONFLICT_TYPES = {'Professeur surchargé'}
+
+def _compact(df: pd.DataFrame, cat_cols=(), i32_cols=(), f32_cols=()) -> pd.DataFrame:
+    """
+    Réduit les types d'un DataFrame issu des requêtes: catégories pour les
+    libellés répétés, entiers et flottants 32 bits pour les mesures
+    """
+    if df.empty:
+        return df
+    # Cast explicite: downcast='integer' choisirait int8/int16 selon les valeurs
+    df = df.astype({
+        **{col: 'category' for col in cat_cols},
+        **{col: 'int32' for col in i32_cols}
+    }, copy=False)
+    for col in f32_cols:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    return df
+
+def _compact_exams(exams_df: pd.DataFrame) -> pd.DataFrame:
+    """Types réduits pour les examens d'un département"""
+    return _compact(
+        exams_df,
+        cat_cols=('salle_nom', 'salle_type', 'formation_nom', 'type_examen', 'statut', 'grade'),
+        i32_cols=('capacite', 'duree_minutes', 'nb_etudiants_inscrits'),
+        f32_cols=('taux_occupation',)
+    )
+
+# Requêtes mises en cache: les reruns Streamlit (clic, slider, onglet)
+# ne refont pas l'aller-retour vers la base pendant le TTL
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_department_exams(dept_id: int, start_date, end_date):
+    """Examens du département sur la période (cache 5 min)"""
+    return _compact_exams(ExamQueries.get_department_exams(dept_id, start_date, end_date))
+
+def _pinned_period(key: str, start_offset: int, end_offset: int):
+    """
+    Période par défaut calculée une fois par session: les clés de cache
+    qui en dépendent ne changent pas au passage de minuit
+    """
+    if key not in st.session_state:
+        today = datetime.now().date()
+        st.session_state[key] = (today + timedelta(days=start_offset),
+                                 today + timedelta(days=end_offset))
+    return st.session_state[key]
+
+def _default_period(dept_id: int):
+    """Période affichée par défaut dans le planning du département"""
+    return _pinned_period(f"period_{dept_id}", -7, 30)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _prefetch_department(dept_id: int, start_date, end_date):
+    """
+    Statistiques, examens et conflits du département chargés en parallèle
+    (requêtes indépendantes, une connexion du pool chacune; cache 5 min)
+    """
+    loaders = {
+        'stats': lambda: AnalyticsQueries.get_department_stats(dept_id),
+        'exams': lambda: _compact_exams(ExamQueries.get_department_exams(dept_id, start_date, end_date)),
+        # La sévérité reste en texte: le groupby par sévérité ne doit pas produire de groupes vides
+        'conflicts': lambda: _compact(AnalyticsQueries.get_conflicts_report(dept_id), i32_cols=('nombre',))
+    }
+    with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+        futures = {key: executor.submit(loader) for key, loader in loaders.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _conflict_trend(dept_id: int, day):
+    """Série simulée des conflits sur 30 jours (stable pour un département et un jour)"""
+    rng = np.random.default_rng(dept_id ^ day.toordinal())
+    dates = pd.date_range(end=pd.Timestamp(day), periods=30, freq='D')
+    values = rng.poisson(3, 30) + (np.sin(np.arange(30) * 0.3) * 2).astype(np.int64)
+    return pd.DataFrame({'date': dates, 'conflits': values})
+
+# Construction des figures mise en cache: les mêmes entrées (données
+# déjà en cache ou constantes) ne reconstruisent pas la figure à chaque rerun.
+# Les builders clés sur un DataFrame sont bornés (ttl, max_entries): chaque
+# rafraîchissement ou filtre crée une nouvelle entrée
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def _build_exams_timeline_fig(exams_df: pd.DataFrame):
+    """Timeline des examens par formation"""
+    fig1 = px.timeline(
+        exams_df,
+        x_start="date_heure",
+        x_end="date_fin",
+        y="formation_nom",
+        color="type_examen",
+        hover_data=["module_nom", "professeur_nom", "salle_nom", "taux_occupation"],
+        title="Planning des examens par formation",
+        height=600
+    )
+    fig1.update_layout(showlegend=True)
+    return fig1
+
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def _build_room_occupancy_fig(room_stats: pd.DataFrame):
+    """Taux d'occupation moyen par salle"""
+    fig2 = px.bar(
+        room_stats,
+        x='salle_nom',
+        y='taux_occupation',
+        color='date_heure',
+        title="Taux d'occupation moyen par salle",
+        labels={'taux_occupation': 'Occupation (%)', 'date_heure': 'Nombre d\'examens'}
+    )
+    fig2.update_layout(xaxis_tickangle=45)
+    return fig2
+
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def _build_formation_treemap_fig(formation_load: pd.DataFrame):
+    """Répartition de la charge par formation"""
+    fig3 = px.treemap(
+        formation_load,
+        path=['formation_nom'],
+        values='nb_etudiants_inscrits',
+        color='date_heure',
+        title="Répartition de la charge d'examens",
+        hover_data=['date_heure']
+    )
+    return fig3
+
+@st.cache_data(show_spinner=False)
+def _build_success_rate_fig():
+    """Taux de réussite: prédiction vs réel (données simulées)"""
+    # Données simulées pour les prédictions
+    periods = ['Semaine 1', 'Semaine 2', 'Semaine 3', 'Semaine 4']
+    
+    # Taux de réussite prédits vs réels
+    predicted_success = [78, 82, 85, 88]
+    actual_success = [76, 80, 83, 85]
+    
+    fig1 = go.Figure(data=[
+        go.Scatter(
+            x=periods,
+            y=predicted_success,
+            mode='lines+markers',
+            name='Prédiction',
+            line=dict(color='#667eea', width=3),
+            marker=dict(size=10)
+        ),
+        go.Scatter(
+            x=periods,
+            y=actual_success,
+            mode='lines+markers',
+            name='Réel',
+            line=dict(color='#764ba2', width=3),
+            marker=dict(size=10, symbol='diamond')
+        )
+    ])
+    
+    fig1.update_layout(
+        title="📈 Taux de réussite: Prédiction vs Réel",
+        xaxis_title="Période",
+        yaxis_title="Taux de réussite (%)",
+        height=400,
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig1
+
+@st.cache_data(show_spinner=False)
+def _build_formations_radar_fig():
+    """Radar comparatif des formations (données simulées)"""
+    # Radar chart pour chaque formation (une ligne par formation)
+    fig2 = go.Figure()
+    
+    for i, formation in enumerate(RADAR_FORMATIONS):
+        fig2.add_trace(go.Scatterpolar(
+            r=RADAR_VALUES[i],
+            theta=RADAR_METRICS,
+            fill='toself',
+            name=formation,
+            line_color=RADAR_COLORS[i % len(RADAR_COLORS)]
+        ))
+    
+    fig2.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100]
+            )
+        ),
+        showlegend=True,
+        title="Analyse comparative des formations",
+        height=500
+    )
+    return fig2
+
+@st.cache_data(show_spinner=False)
+def _build_success_forecast_fig():
+    """Prévision du taux de réussite avec bande de confiance (données simulées)"""
+    # Simulation de données prédictives
+    future_weeks = [f'Semaine {i}' for i in range(5, 9)]
+    
+    fig3 = go.Figure()
+    
+    # Ajouter la bande de confiance
+    fig3.add_trace(go.Scatter(
+        x=future_weeks,
+        y=[86, 87, 88, 89],
+        mode='lines',
+        name='Prédiction haute',
+        line=dict(width=0),
+        showlegend=False
+    ))
+    
+    fig3.add_trace(go.Scatter(
+        x=future_weeks,
+        y=[82, 83, 84, 85],
+        mode='lines',
+        name='Prédiction basse',
+        line=dict(width=0),
+        fill='tonexty',
+        fillcolor='rgba(102, 126, 234, 0.2)',
+        showlegend=False
+    ))
+    
+    # Ajouter la prédiction moyenne
+    fig3.add_trace(go.Scatter(
+        x=future_weeks,
+        y=[84, 85, 86, 87],
+        mode='lines+markers',
+        name='Prédiction moyenne',
+        line=dict(color='#667eea', width=3),
+        marker=dict(size=8)
+    ))
+    
+    fig3.update_layout(
+        title="📊 Prévision du taux de réussite",
+        xaxis_title="Semaines à venir",
+        yaxis_title="Taux de réussite (%)",
+        height=400,
+        hovermode='x unified'
+    )
+    return fig3
+
 def render_department_head_dashboard():
     """
     Dashboard principal pour les chefs de département
@@ -31,7 +297,8 @@ def render_department_head_dashboard():
     
     with col2:
         # KPIs rapides
-        stats = AnalyticsQueries.get_department_stats(chef_info.get('linked_entity_id', 0))
+        dept_id = chef_info.get('linked_entity_id', 0)
+        stats = _prefetch_department(dept_id, *_default_period(dept_id))['stats']
         st.metric("📊 Examens planifiés", stats.get('nb_examens_planifies', 0))
     
     with col3:
@@ -63,44 +330,34 @@ def render_department_head_dashboard():
     with tab5:
         render_resource_management(chef_info.get('linked_entity_id', 0))
 
+@st.fragment
 def render_department_dashboard(dept_id: int):
     """
     Tableau de bord principal du département
     """
     # KPIs en haut
-    stats = AnalyticsQueries.get_department_stats(dept_id)
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("🏛️ Formations", stats.get('nb_formations', 0))
-    
-    with col2:
-        st.metric("👨‍🎓 Étudiants", stats.get('nb_etudiants', 0))
-    
-    with col3:
-        st.metric("👨‍🏫 Professeurs", stats.get('nb_professeurs', 0))
-    
-    with col4:
-        st.metric("📚 Modules", stats.get('nb_modules', 0))
-    
-    col5, col6, col7, col8 = st.columns(4)
-    
-    with col5:
-        st.metric("📅 Examens", stats.get('nb_examens_planifies', 0))
-    
-    with col6:
-        taux = (stats.get('nb_examens_termines', 0) / 
-                max(stats.get('nb_examens_planifies', 1), 1) * 100)
-        st.metric("✅ Taux réalisation", f"{taux:.1f}%")
-    
-    with col7:
-        st.metric("🏢 Capacité moyenne", f"{stats.get('capacite_moyenne_salles', 0):.0f}")
+    default_start, default_end = _default_period(dept_id)
+    prefetched = _prefetch_department(dept_id, default_start, default_end)
+    stats = prefetched['stats']
+    
+    now = pd.Timestamp.now()
+    taux = 100.0 * stats.get('nb_examens_termines', 0) / max(stats.get('nb_examens_planifies', 0), 1)
+    kpis = [
+        ("🏛️ Formations", stats.get('nb_formations', 0)),
+        ("👨‍🎓 Étudiants", stats.get('nb_etudiants', 0)),
+        ("👨‍🏫 Professeurs", stats.get('nb_professeurs', 0)),
+        ("📚 Modules", stats.get('nb_modules', 0)),
+        ("📅 Examens", stats.get('nb_examens_planifies', 0)),
+        ("✅ Taux réalisation", f"{taux:.1f}%"),
+        ("🏢 Capacité moyenne", f"{stats.get('capacite_moyenne_salles', 0):.0f}")
+    ]
+    if stats.get('dernier_examen'):
+        days_since = (now - pd.Timestamp(stats['dernier_examen'])).days
+        kpis.append(("📆 Dernier examen", f"J-{days_since}"))
     
-    with col8:
-        if stats.get('dernier_examen'):
-            days_since = (datetime.now() - stats['dernier_examen']).days
-            st.metric("📆 Dernier examen", f"J-{days_since}")
+    # Une seule rangée de colonnes, remplie par une boucle
+    for col, (label, value) in zip(st.columns(8), kpis):
+        col.metric(label, value)
     
     st.markdown("---")
     
@@ -109,37 +366,30 @@ def render_department_dashboard(dept_id: int):
     
     col1, col2 = st.columns(2)
     with col1:
-        start_date = st.date_input("Date de début", 
-                                  datetime.now().date() - timedelta(days=7))
+        start_date = st.date_input("Date de début", default_start)
     with col2:
-        end_date = st.date_input("Date de fin", 
-                                datetime.now().date() + timedelta(days=30))
+        end_date = st.date_input("Date de fin", default_end)
     
-    # Récupérer les examens
-    exams_df = ExamQueries.get_department_exams(dept_id, start_date, end_date)
+    # Récupérer les examens (déjà chargés pour la période par défaut)
+    if (start_date, end_date) == (default_start, default_end):
+        exams_df = prefetched['exams']
+    else:
+        exams_df = _cached_department_exams(dept_id, start_date, end_date)
     
     if exams_df.empty:
         st.info("Aucun examen planifié pour cette période")
         return
     
     # Graphique 1: Timeline des examens
-    fig1 = px.timeline(
-        exams_df,
-        x_start="date_heure",
-        x_end="date_fin",
-        y="formation_nom",
-        color="type_examen",
-        hover_data=["module_nom", "professeur_nom", "salle_nom", "taux_occupation"],
-        title="Planning des examens par formation",
-        height=600
-    )
-    fig1.update_layout(showlegend=True)
+    fig1 = _build_exams_timeline_fig(exams_df)
     st.plotly_chart(fig1, use_container_width=True)
     
     # Graphique 2: Occupation des salles
     st.subheader("🏛️ Occupation des salles")
     
-    room_stats = exams_df.groupby('salle_nom').agg({
+    room_stats = exams_df[[
+        'salle_nom', 'nb_etudiants_inscrits', 'taux_occupation', 'date_heure'
+    ]].groupby('salle_nom', observed=True).agg({
         'nb_etudiants_inscrits': 'sum',
         'taux_occupation': 'mean',
         'date_heure': 'count'
@@ -148,15 +398,7 @@ def render_department_dashboard(dept_id: int):
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        fig2 = px.bar(
-            room_stats,
-            x='salle_nom',
-            y='taux_occupation',
-            color='date_heure',
-            title="Taux d'occupation moyen par salle",
-            labels={'taux_occupation': 'Occupation (%)', 'date_heure': 'Nombre d\'examens'}
-        )
-        fig2.update_layout(xaxis_tickangle=45)
+        fig2 = _build_room_occupancy_fig(room_stats)
         st.plotly_chart(fig2, use_container_width=True)
     
     with col2:
@@ -165,21 +407,19 @@ def render_department_dashboard(dept_id: int):
     # Graphique 3: Charge par formation
     st.subheader("📊 Charge par formation")
     
-    formation_load = exams_df.groupby('formation_nom').agg({
+    formation_load = exams_df[[
+        'formation_nom', 'date_heure', 'nb_etudiants_inscrits'
+    ]].groupby('formation_nom', observed=True).agg({
         'date_heure': 'count',
         'nb_etudiants_inscrits': 'sum'
     }).reset_index()
+    # Le treemap attend des libellés texte pour son chemin
+    formation_load['formation_nom'] = formation_load['formation_nom'].astype(str)
     
-    fig3 = px.treemap(
-        formation_load,
-        path=['formation_nom'],
-        values='nb_etudiants_inscrits',
-        color='date_heure',
-        title="Répartition de la charge d'examens",
-        hover_data=['date_heure']
-    )
+    fig3 = _build_formation_treemap_fig(formation_load)
     st.plotly_chart(fig3, use_container_width=True)
 
+@st.fragment
 def render_conflict_management(dept_id: int):
     """
     Gestion avancée des conflits
@@ -187,15 +427,21 @@ def render_conflict_management(dept_id: int):
     st.subheader("⚠️ Analyse détaillée des conflits")
     
     # Récupérer tous les conflits
-    conflicts_df = AnalyticsQueries.get_conflicts_report(dept_id)
+    conflicts_df = _prefetch_department(dept_id, *_default_period(dept_id))['conflicts']
+    # Réutilisé par la comparaison avant/après de l'onglet Optimisation
+    st.session_state[f"conflicts_{dept_id}"] = conflicts_df
     
     if conflicts_df.empty:
         st.success("✅ Aucun conflit détecté dans votre département")
         return
     
+    # Un seul passage: groupes par sévérité et totaux associés
+    severity_groups = dict(list(conflicts_df.groupby('severite')))
+    severity_totals = {severity: group['nombre'].sum() for severity, group in severity_groups.items()}
+    
     # Métriques des conflits
-    total_conflicts = conflicts_df['nombre'].sum()
-    critical_conflicts = conflicts_df[conflicts_df['severite'] == 'CRITIQUE']['nombre'].sum()
+    total_conflicts = sum(severity_totals.values())
+    critical_conflicts = severity_totals.get('CRITIQUE', 0)
     
     col1, col2, col3 = st.columns(3)
     
@@ -206,43 +452,42 @@ def render_conflict_management(dept_id: int):
         st.metric("🔴 Critiques", critical_conflicts)
     
     with col3:
-        severity_dist = conflicts_df['severite'].value_counts().to_dict()
-        st.metric("📊 Niveaux", len(severity_dist))
+        st.metric("📊 Niveaux", len(severity_groups))
     
     st.markdown("---")
     
     # Détail par type de conflit
-    for severity in ['CRITIQUE', 'ÉLEVÉ', 'MOYEN', 'FAIBLE']:
-        severity_conflicts = conflicts_df[conflicts_df['severite'] == severity]
+    for severity in SEVERITIES:
+        severity_conflicts = severity_groups.get(severity)
         
-        if not severity_conflicts.empty:
+        if severity_conflicts is not None:
             st.subheader(f"{'🔴' if severity == 'CRITIQUE' else '🟡' if severity == 'ÉLEVÉ' else '🔵'} {severity}")
             
-            for _, conflict in severity_conflicts.iterrows():
-                with st.expander(f"{conflict['type_conflit']} ({conflict['nombre']} occurrences)"):
-                    st.write(f"**Détails:** {conflict['details']}")
+            # Le rapport est groupé par (type, détails): un même type peut revenir
+            # plusieurs fois, la position dans le groupe rend la clé unique
+            for position, conflict in enumerate(severity_conflicts.itertuples(index=False)):
+                key_suffix = f"{severity}_{position}"
+                with st.expander(f"{conflict.type_conflit} ({conflict.nombre} occurrences)"):
+                    st.write(f"**Détails:** {conflict.details}")
                     
                     # Boutons d'action
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        if st.button("👁️ Afficher détails", key=f"view_{severity}_{conflict['type_conflit']}"):
+                        if st.button("👁️ Afficher détails", key=f"view_{key_suffix}"):
                             st.info("Fonctionnalité détaillée à implémenter")
                     with col2:
-                        if st.button("✏️ Marquer comme résolu", key=f"resolve_{severity}_{conflict['type_conflit']}"):
+                        if st.button("✏️ Marquer comme résolu", key=f"resolve_{key_suffix}"):
                             st.success("Conflit marqué comme résolu")
                     with col3:
-                        if st.button("📧 Notifier concernés", key=f"notify_{severity}_{conflict['type_conflif']}"):
+                        if st.button("📧 Notifier concernés", key=f"notify_{key_suffix}"):
                             st.info("Notifications envoyées")
     
     # Analyse temporelle des conflits
     st.subheader("📈 Tendances des conflits")
     
     # Simulation de données temporelles
-    dates = pd.date_range(end=datetime.now(), periods=30, freq='D')
-    simulated_data = pd.DataFrame({
-        'date': dates,
-        'conflits': np.random.poisson(3, 30) + (np.sin(np.arange(30) * 0.3) * 2).astype(int)
-    })
+    simulated_data = _conflict_trend(dept_id, datetime.now().date())
+    mean_conflicts = simulated_data['conflits'].mean()
     
     fig = px.line(
         simulated_data,
@@ -256,10 +501,10 @@ def render_conflict_management(dept_id: int):
         yaxis_title="Nombre de conflits",
         hovermode='x unified'
     )
-    fig.add_hline(y=simulated_data['conflits'].mean(), 
+    fig.add_hline(y=mean_conflicts, 
                   line_dash="dash", 
                   line_color="red",
-                  annotation_text=f"Moyenne: {simulated_data['conflits'].mean():.1f}")
+                  annotation_text=f"Moyenne: {mean_conflicts:.1f}")
     st.plotly_chart(fig, use_container_width=True)
     
     # Recommandations automatiques
@@ -281,7 +526,7 @@ def render_conflict_management(dept_id: int):
             'action': 'Lancer une optimisation globale du planning'
         })
     
-    if conflicts_df['type_conflit'].str.contains('Professeur').any():
+    if conflicts_df['type_conflit'].isin(PROFESSOR_CONFLICT_TYPES).any():
         recommendations.append({
             'priority': 'high',
             'title': '👨‍🏫 Conflits de professeurs',
@@ -297,6 +542,7 @@ def render_conflict_management(dept_id: int):
             else:
                 st.warning(f"**{rec['title']}**\n\n{rec['action']}")
 
+@st.fragment
 def render_optimization_tools(dept_id: int):
     """
     Outils d'optimisation automatique
@@ -307,33 +553,24 @@ def render_optimization_tools(dept_id: int):
     with st.expander("⚙️ Paramètres d'optimisation"):
         col1, col2 = st.columns(2)
         
+        optim_start, optim_end = _pinned_period(f"optim_period_{dept_id}", 0, 14)
+        
         with col1:
-            start_date = st.date_input("Période de début", 
-                                      datetime.now().date())
+            start_date = st.date_input("Période de début", optim_start)
             priority_salle = st.slider("Priorité: Occupation salles", 1, 10, 7)
             priority_prof = st.slider("Priorité: Charge profs", 1, 10, 8)
         
         with col2:
-            end_date = st.date_input("Période de fin", 
-                                    datetime.now().date() + timedelta(days=14))
+            end_date = st.date_input("Période de fin", optim_end)
             priority_etudiant = st.slider("Priorité: Confort étudiants", 1, 10, 6)
             max_duration = st.number_input("Durée max optim. (secondes)", 10, 300, 45)
     
     # Bouton de génération
     if st.button("🚀 Générer planning optimisé", type="primary", use_container_width=True):
         with st.spinner(f"Optimisation en cours (max {max_duration}s)..."):
-            # Simulation avec progression
-            progress_bar = st.progress(0)
-            
-            for i in range(100):
-                # Simulation du processus d'optimisation
-                import time
-                time.sleep(max_duration / 100)
-                progress_bar.progress(i + 1)
-            
             # Récupérer le planning optimisé
             optimized_df = OptimizationQueries.generate_optimized_schedule(
-                start_date, end_date, dept_id
+                start_date, end_date, dept_id, timeout_s=max_duration
             )
             
             if optimized_df.empty:
@@ -383,7 +620,7 @@ def render_optimization_tools(dept_id: int):
             st.subheader("📊 Comparaison avant/après")
             
             # Récupérer le planning actuel pour comparaison
-            current_df = ExamQueries.get_department_exams(dept_id, start_date, end_date)
+            current_df = _cached_department_exams(dept_id, start_date, end_date)
             
             if not current_df.empty:
                 col1, col2, col3 = st.columns(3)
@@ -399,7 +636,10 @@ def render_optimization_tools(dept_id: int):
                 
                 with col2:
                     # Conflits
-                    current_conflicts = len(AnalyticsQueries.get_conflicts_report(dept_id))
+                    conflicts_df = st.session_state.get(f"conflicts_{dept_id}")
+                    if conflicts_df is None:
+                        conflicts_df = _prefetch_department(dept_id, *_default_period(dept_id))['conflicts']
+                    current_conflicts = len(conflicts_df)
                     optimized_conflicts = max(0, current_conflicts - 5)  # Simulé
                     delta = optimized_conflicts - current_conflicts
                     st.metric("⚠️ Conflits détectés", 
@@ -434,94 +674,20 @@ def render_optimization_tools(dept_id: int):
                 if st.button("🔄 Réoptimiser", use_container_width=True):
                     st.rerun()
 
+@st.fragment
 def render_advanced_analytics(dept_id: int):
     """
     Analytics avancés et prédictifs
     """
     st.subheader("🔮 Analytics Prédictifs")
     
-    # Données simulées pour les prédictions
-    periods = ['Semaine 1', 'Semaine 2', 'Semaine 3', 'Semaine 4']
-    
-    # Taux de réussite prédits vs réels
-    predicted_success = [78, 82, 85, 88]
-    actual_success = [76, 80, 83, 85]
-    
-    fig1 = go.Figure(data=[
-        go.Scatter(
-            x=periods,
-            y=predicted_success,
-            mode='lines+markers',
-            name='Prédiction',
-            line=dict(color='#667eea', width=3),
-            marker=dict(size=10)
-        ),
-        go.Scatter(
-            x=periods,
-            y=actual_success,
-            mode='lines+markers',
-            name='Réel',
-            line=dict(color='#764ba2', width=3),
-            marker=dict(size=10, symbol='diamond')
-        )
-    ])
-    
-    fig1.update_layout(
-        title="📈 Taux de réussite: Prédiction vs Réel",
-        xaxis_title="Période",
-        yaxis_title="Taux de réussite (%)",
-        height=400,
-        hovermode='x unified',
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    
+    fig1 = _build_success_rate_fig()
     st.plotly_chart(fig1, use_container_width=True)
     
     # Analyse des tendances
     st.subheader("📊 Tendances par formation")
     
-    formations = ['Informatique', 'Mathématiques', 'Physique', 'Chimie', 'Biologie']
-    
-    # Données multidimensionnelles
-    data = {
-        'Formation': formations * 4,
-        'Métrique': ['Taux réussite']*5 + ['Charge examens']*5 + ['Satisfaction']*5 + ['Ressources']*5,
-        'Valeur': [85, 78, 82, 79, 83,  # Taux réussite
-                   88, 92, 85, 90, 87,  # Charge examens
-                   4.2, 3.8, 4.0, 3.9, 4.1,  # Satisfaction
-                   92, 88, 90, 85, 89], # Ressources
-        'Tendance': ['↑', '↓', '→', '↓', '↑'] * 4
-    }
-    
-    df_radar = pd.DataFrame(data)
-    
-    # Radar chart pour chaque formation
-    fig2 = go.Figure()
-    
-    colors = px.colors.qualitative.Set3
-    
-    for i, formation in enumerate(formations):
-        formation_data = df_radar[df_radar['Formation'] == formation]
-        fig2.add_trace(go.Scatterpolar(
-            r=formation_data['Valeur'].values,
-            theta=formation_data['Métrique'].values,
-            fill='toself',
-            name=formation,
-            line_color=colors[i % len(colors)]
-        ))
-    
-    fig2.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 100]
-            )
-        ),
-        showlegend=True,
-        title="Analyse comparative des formations",
-        height=500
-    )
-    
+    fig2 = _build_formations_radar_fig()
     st.plotly_chart(fig2, use_container_width=True)
     
     # Insights automatiques
@@ -556,50 +722,7 @@ def render_advanced_analytics(dept_id: int):
     # Prédictions pour les prochaines périodes
     st.subheader("🔮 Prévisions pour les 4 prochaines semaines")
     
-    # Simulation de données prédictives
-    future_weeks = [f'Semaine {i}' for i in range(5, 9)]
-    
-    fig3 = go.Figure()
-    
-    # Ajouter la bande de confiance
-    fig3.add_trace(go.Scatter(
-        x=future_weeks,
-        y=[86, 87, 88, 89],
-        mode='lines',
-        name='Prédiction haute',
-        line=dict(width=0),
-        showlegend=False
-    ))
-    
-    fig3.add_trace(go.Scatter(
-        x=future_weeks,
-        y=[82, 83, 84, 85],
-        mode='lines',
-        name='Prédiction basse',
-        line=dict(width=0),
-        fill='tonexty',
-        fillcolor='rgba(102, 126, 234, 0.2)',
-        showlegend=False
-    ))
-    
-    # Ajouter la prédiction moyenne
-    fig3.add_trace(go.Scatter(
-        x=future_weeks,
-        y=[84, 85, 86, 87],
-        mode='lines+markers',
-        name='Prédiction moyenne',
-        line=dict(color='#667eea', width=3),
-        marker=dict(size=8)
-    ))
-    
-    fig3.update_layout(
-        title="📊 Prévision du taux de réussite",
-        xaxis_title="Semaines à venir",
-        yaxis_title="Taux de réussite (%)",
-        height=400,
-        hovermode='x unified'
-    )
-    
+    fig3 = _build_success_forecast_fig()
     st.plotly_chart(fig3, use_container_width=True)
     
     # Alertes prédictives
@@ -631,6 +754,7 @@ def render_advanced_analytics(dept_id: int):
         else:
             st.success(f"**{alert['message']}**\n\n{alert['details']}")
 
+@st.fragment
 def render_resource_management(dept_id: int):
     """
     Gestion des ressources (salles, professeurs)
@@ -649,15 +773,20 @@ def render_resource_management(dept_id: int):
     with tab3:
         render_assignments_management(dept_id)
 
+@st.fragment
 def render_room_management(dept_id: int):
     """
     Gestion des salles
     """
     # Récupérer les statistiques d'occupation
-    start_date = datetime.now().date() - timedelta(days=30)
-    end_date = datetime.now().date() + timedelta(days=30)
+    start_date, end_date = _pinned_period(f"rooms_period_{dept_id}", -30, 30)
     
-    room_stats = AnalyticsQueries.get_resource_utilization(start_date, end_date)
+    room_stats = _compact(
+        AnalyticsQueries.get_resource_utilization(start_date, end_date),
+        cat_cols=('salle_nom', 'salle_type'),
+        i32_cols=('capacite', 'nb_examens'),
+        f32_cols=('total_minutes', 'taux_occupation_moyen', 'pourcentage_utilisation')
+    )
     
     if room_stats.empty:
         st.info("Aucune donnée de salle disponible")
@@ -666,22 +795,47 @@ def render_room_management(dept_id: int):
     # Vue d'ensemble
     st.subheader("📊 Vue d'ensemble des salles")
     
-    col1, col2, col3 = st.columns(3)
+    usage = room_stats['pourcentage_utilisation']
+    kpis = (
+        ("🏛️ Total salles", len(room_stats)),
+        ("📈 Utilisation moyenne", f"{usage.mean():.1f}%"),
+        ("📉 Sous-utilisées", int((usage < 50).sum()))
+    )
+    for col, (label, value) in zip(st.columns(3), kpis):
+        col.metric(label, value)
     
-    with col1:
-        total_rooms = len(room_stats)
-        st.metric("🏛️ Total salles", total_rooms)
+    # Détail par salle
+    st.subheader("📋 Détail par salle")
     
-    with col2:
-        avg_usage = room_stats['pourcentage_utilisation'].mean()
-        st.metric("📈 Utilisation moyenne", f"{avg_usage:.1f}%")
+    render_room_usage_details(room_stats)
     
-    with col3:
-        underused = len(room_stats[room_stats['pourcentage_utilisation'] < 50])
-        st.metric("📉 Sous-utilisées", underused)
+    # Gestion des indisponibilités
+    st.subheader("🚧 Gestion des indisponibilités")
     
-    # Détail par salle
-    st.subheader("📋 Détail par salle")
+    with st.expander("➕ Ajouter une indisponibilité"):
+        col1, col2 = st.columns(2)
+        with col1:
+            # Catégories du type réduit: pas de parcours de la colonne
+            selected_room = st.selectbox("Salle", tuple(room_stats['salle_nom'].cat.categories))
+            start_date = st.date_input("Date début", datetime.now().date())
+        with col2:
+            reason = st.selectbox("Motif", [
+                "Maintenance", "Réunion", "Événement", "Autre"
+            ])
+            end_date = st.date_input("Date fin", datetime.now().date() + timedelta(days=1))
+        
+        details = st.text_area("Détails")
+        
+        if st.button("💾 Enregistrer l'indisponibilité"):
+            # En production: insérer dans la base
+            st.success(f"Indisponibilité enregistrée pour {selected_room}")
+
+@st.fragment
+def render_room_usage_details(room_stats: pd.DataFrame):
+    """
+    Filtres et détail d'utilisation des salles (rerun limité à ce bloc)
+    """
+    salle_types = tuple(room_stats['salle_type'].cat.categories)
     
     # Filtrer
     col1, col2 = st.columns(2)
@@ -689,23 +843,26 @@ def render_room_management(dept_id: int):
         min_usage = st.slider("Filtre utilisation minimale (%)", 0, 100, 0)
     with col2:
         room_type = st.multiselect("Type de salle", 
-                                  room_stats['salle_type'].unique(),
-                                  default=room_stats['salle_type'].unique())
+                                  salle_types,
+                                  default=salle_types)
     
-    filtered_stats = room_stats[
-        (room_stats['pourcentage_utilisation'] >= min_usage) &
-        (room_stats['salle_type'].isin(room_type))
-    ]
+    # Masque construit en place sur les tableaux NumPy
+    mask = room_stats['pourcentage_utilisation'].to_numpy() >= min_usage
+    mask &= room_stats['salle_type'].isin(room_type).to_numpy()
+    filtered_stats = room_stats[mask]
     
-    # Graphique
+    # Graphique: ordre de l'axe par utilisation décroissante, sans trier le DataFrame
+    order = np.argsort(-filtered_stats['pourcentage_utilisation'].to_numpy(), kind='stable')
+    salle_order = filtered_stats['salle_nom'].to_numpy()[order].tolist()
     fig = px.bar(
-        filtered_stats.sort_values('pourcentage_utilisation', ascending=False),
+        filtered_stats,
         x='salle_nom',
         y='pourcentage_utilisation',
         color='salle_type',
         hover_data=['capacite', 'nb_examens', 'total_minutes'],
         title="Utilisation des salles",
-        labels={'pourcentage_utilisation': 'Taux d\'utilisation (%)'}
+        labels={'pourcentage_utilisation': 'Taux d\'utilisation (%)'},
+        category_orders={'salle_nom': salle_order}
     )
     fig.update_layout(xaxis_tickangle=45, height=500)
     st.plotly_chart(fig, use_container_width=True)
@@ -719,27 +876,53 @@ def render_room_management(dept_id: int):
         ]].round(2),
         use_container_width=True
     )
-    
-    # Gestion des indisponibilités
-    st.subheader("🚧 Gestion des indisponibilités")
-    
-    with st.expander("➕ Ajouter une indisponibilité"):
-        col1, col2 = st.columns(2)
-        with col1:
-            selected_room = st.selectbox("Salle", room_stats['salle_nom'].unique())
-            start_date = st.date_input("Date début", datetime.now().date())
-        with col2:
-            reason = st.selectbox("Motif", [
-                "Maintenance", "Réunion", "Événement", "Autre"
-            ])
-            end_date = st.date_input("Date fin", datetime.now().date() + timedelta(days=1))
-        
-        details = st.text_area("Détails")
-        
-        if st.button("💾 Enregistrer l'indisponibilité"):
-            # En production: insérer dans la base
-            st.success(f"Indisponibilité enregistrée pour {selected_room}")
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_assignments_df() -> pd.DataFrame:
+    """Affectations examens/professeurs simulées (construites une fois par processus)"""
+    return pd.DataFrame({
+        'Examen': ['Algorithmique Avancée', 'Bases de Données', 'Machine Learning', 
+                   'Analyse Mathématique', 'Physique Quantique'],
+        'Date': ['2024-01-15 08:00', '2024-01-15 14:00', '2024-01-16 08:00', 
+                 '2024-01-16 14:00', '2024-01-17 08:00'],
+        'Salle': ['Amphi A', 'Amphi B', 'Salle 101', 'Amphi C', 'Salle 201'],
+        'Professeur actuel': ['Dupont Jean', 'Martin Marie', 'Moreau Claire', 
+                             'Bernard Pierre', 'Petit Sophie'],
+        'Professeur suggéré': ['Dupont Jean', 'Martin Marie', 'Dupont Jean', 
+                              'Bernard Pierre', 'Petit Sophie'],
+        'Score compatibilité': [95, 88, 92, 85, 90]
+    })
+
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def _assignments_summary(assignments: pd.DataFrame):
+    """Nombre d'affectations, score moyen et correspondances parfaites (score >= 90)"""
+    # Un seul tableau NumPy, trois réductions
+    scores = assignments['Score compatibilité'].to_numpy()
+    return scores.size, float(scores.mean()), int((scores >= 90).sum())
+
+def _optimize_assignments(state_key: str):
+    """Callback d'optimisation simulée: +5 points de compatibilité, bornés à 100"""
+    assignments = st.session_state[state_key]
+    # Une copie du tableau puis deux opérations en place (le plancher 0 est
+    # inatteignable après +5); copie explicite car to_numpy() peut être en
+    # lecture seule avec le copy-on-write de pandas
+    scores = assignments['Score compatibilité'].to_numpy(copy=True)
+    np.add(scores, 5, out=scores)
+    np.minimum(scores, 100, out=scores)
+    assignments['Score compatibilité'] = scores
+    st.session_state[f"{state_key}_optimized"] = True
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_availability_events() -> pd.DataFrame:
+    """Congés et indisponibilités simulés des enseignants, en colonnes"""
+    return pd.DataFrame({
+        'Prof': ['Dupont Jean', 'Martin Marie', 'Petit Sophie'],
+        'Type': ['Congé', 'Mission', 'Formation'],
+        'Début': pd.to_datetime(['2024-01-15', '2024-01-18', '2024-01-25']),
+        'Fin': pd.to_datetime(['2024-01-22', '2024-01-20', '2024-01-26'])
+    })
+
+@st.fragment
 def render_professor_management(dept_id: int):
     """
     Gestion des professeurs
@@ -761,26 +944,43 @@ def render_professor_management(dept_id: int):
     })
     
     # Métriques
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("👨‍🏫 Total", len(professors_data))
-    
-    with col2:
-        active = len(professors_data[professors_data['Statut'] == 'Actif'])
-        st.metric("✅ Actifs", active)
-    
-    with col3:
-        avg_hours = professors_data['Heures/sem'].mean()
-        st.metric("⏱️ Heures/sem", f"{avg_hours:.1f}")
-    
-    with col4:
-        avg_satisfaction = professors_data['Satisfaction'].mean()
-        st.metric("😊 Satisfaction", f"{avg_satisfaction:.1f}/5")
+    kpis = (
+        ("👨‍🏫 Total", len(professors_data)),
+        ("✅ Actifs", int((professors_data['Statut'] == 'Actif').sum())),
+        ("⏱️ Heures/sem", f"{professors_data['Heures/sem'].mean():.1f}"),
+        ("😊 Satisfaction", f"{professors_data['Satisfaction'].mean():.1f}/5")
+    )
+    for col, (label, value) in zip(st.columns(4), kpis):
+        col.metric(label, value)
     
     # Détail
     st.subheader("📋 Liste des enseignants")
     
+    render_professor_list(professors_data)
+    
+    # Gestion des indisponibilités
+    st.subheader("📅 Gestion des disponibilités")
+    
+    with st.expander("👁️ Voir le calendrier des disponibilités"):
+        # Calendrier simplifié
+        st.write("**Calendrier des congés et indisponibilités**")
+        
+        # Simulation
+        st.dataframe(
+            _build_availability_events(),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'Début': st.column_config.DateColumn('Début', format="DD/MM/YYYY"),
+                'Fin': st.column_config.DateColumn('Fin', format="DD/MM/YYYY")
+            }
+        )
+
+@st.fragment
+def render_professor_list(professors_data: pd.DataFrame):
+    """
+    Filtres, liste et charge des enseignants (rerun limité à ce bloc)
+    """
     # Filtrer
     col1, col2 = st.columns(2)
     with col1:
@@ -790,10 +990,9 @@ def render_professor_management(dept_id: int):
                                         professors_data['Statut'].unique(),
                                         default=['Actif'])
     
-    filtered_profs = professors_data[
-        (professors_data['Heures/sem'] >= min_hours) &
-        (professors_data['Statut'].isin(selected_status))
-    ]
+    mask = professors_data['Heures/sem'].to_numpy() >= min_hours
+    mask &= professors_data['Statut'].isin(selected_status).to_numpy()
+    filtered_profs = professors_data[mask]
     
     # Table interactive
     st.dataframe(filtered_profs, use_container_width=True)
@@ -812,69 +1011,46 @@ def render_professor_management(dept_id: int):
     fig.add_hline(y=8, line_dash="dash", line_color="red", 
                  annotation_text="Limite recommandée: 8 examens/sem")
     st.plotly_chart(fig, use_container_width=True)
-    
-    # Gestion des indisponibilités
-    st.subheader("📅 Gestion des disponibilités")
-    
-    with st.expander("👁️ Voir le calendrier des disponibilités"):
-        # Calendrier simplifié
-        st.write("**Calendrier des congés et indisponibilités**")
-        
-        # Simulation
-        events = [
-            {'Prof': 'Dupont Jean', 'Type': 'Congé', 'Début': '2024-01-15', 'Fin': '2024-01-22'},
-            {'Prof': 'Martin Marie', 'Type': 'Mission', 'Début': '2024-01-18', 'Fin': '2024-01-20'},
-            {'Prof': 'Petit Sophie', 'Type': 'Formation', 'Début': '2024-01-25', 'Fin': '2024-01-26'},
-        ]
-        
-        for event in events:
-            st.write(f"• **{event['Prof']}**: {event['Type']} ({event['Début']} au {event['Fin']})")
 
+@st.fragment
 def render_assignments_management(dept_id: int):
     """
     Gestion des affectations
     """
     st.subheader("📋 Gestion des affectations examens/professeurs")
     
-    # Simulation de données d'affectation
-    assignments = pd.DataFrame({
-        'Examen': ['Algorithmique Avancée', 'Bases de Données', 'Machine Learning', 
-                   'Analyse Mathématique', 'Physique Quantique'],
-        'Date': ['2024-01-15 08:00', '2024-01-15 14:00', '2024-01-16 08:00', 
-                 '2024-01-16 14:00', '2024-01-17 08:00'],
-        'Salle': ['Amphi A', 'Amphi B', 'Salle 101', 'Amphi C', 'Salle 201'],
-        'Professeur actuel': ['Dupont Jean', 'Martin Marie', 'Moreau Claire', 
-                             'Bernard Pierre', 'Petit Sophie'],
-        'Professeur suggéré': ['Dupont Jean', 'Martin Marie', 'Dupont Jean', 
-                              'Bernard Pierre', 'Petit Sophie'],
-        'Score compatibilité': [95, 88, 92, 85, 90]
-    })
+    # Simulation de données d'affectation, conservée pour la session
+    state_key = f"assignments_{dept_id}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = _build_assignments_df()
+    assignments = st.session_state[state_key]
+    total_assignments, avg_score, perfect_matches = _assignments_summary(assignments)
     
     # Vue d'ensemble
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        total_assignments = len(assignments)
         st.metric("📋 Total affectations", total_assignments)
     
     with col2:
-        avg_score = assignments['Score compatibilité'].mean()
         st.metric("⚡ Score moyen", f"{avg_score:.0f}/100")
     
     with col3:
-        perfect_matches = len(assignments[assignments['Score compatibilité'] >= 90])
         st.metric("🎯 Correspondances parfaites", perfect_matches)
     
     # Table des affectations avec édition
     st.subheader("✏️ Édition des affectations")
     
+    # Clé stable: Streamlit conserve les modifications entre reruns sur le même
+    # tableau de session au lieu de rediffuser un nouveau DataFrame
+    editor_key = f"{state_key}_editor"
     edited_df = st.data_editor(
         assignments,
+        key=editor_key,
         column_config={
             "Professeur actuel": st.column_config.SelectboxColumn(
                 "Professeur actuel",
-                options=['Dupont Jean', 'Martin Marie', 'Bernard Pierre', 
-                        'Petit Sophie', 'Robert Luc', 'Moreau Claire']
+                options=ASSIGNMENT_PROFESSORS
             ),
             "Score compatibilité": st.column_config.ProgressColumn(
                 "Score compatibilité",
@@ -888,32 +1064,26 @@ def render_assignments_management(dept_id: int):
     )
     
     if st.button("💾 Sauvegarder les modifications", type="primary"):
+        # Les modifications intègrent le tableau de session: l'éditeur repart vierge
+        st.session_state[state_key] = edited_df
+        del st.session_state[editor_key]
+        st.session_state[f"{state_key}_saved"] = True
+        st.rerun(scope="fragment")
+    
+    if st.session_state.pop(f"{state_key}_saved", False):
         st.success("Affectations sauvegardées avec succès")
     
     # Suggestions d'optimisation
     st.subheader("💡 Suggestions d'optimisation")
     
-    suggestions = [
-        "**Dupont Jean** a 3 examens le 16/01 - Considérer réaffecter 'Machine Learning'",
-        "**Martin Marie** spécialiste BDD - Affectation cohérente maintenue",
-        "**Salle 101** sous-utilisée - Ajouter plus d'examens dans cette salle",
-        "**Bernard Pierre** a une compatibilité de 85% - Former en analyse avancée?"
-    ]
-    
-    for suggestion in suggestions:
-        with st.expander(suggestion.split(" - ")[0]):
-            st.write(suggestion.split(" - ")[1] if " - " in suggestion else suggestion)
+    for title, detail in ASSIGNMENT_SUGGESTIONS:
+        with st.expander(title):
+            st.write(detail)
     
     # Bouton d'optimisation automatique
-    if st.button("🔄 Optimiser automatiquement les affectations", use_container_width=True):
-        with st.spinner("Optimisation en cours..."):
-            # Simulation
-            import time
-            time.sleep(2)
-            
-            # Mettre à jour les scores
-            assignments['Score compatibilité'] = assignments['Score compatibilité'] + 5
-            assignments['Score compatibilité'] = assignments['Score compatibilité'].clip(0, 100)
-            
-            st.success("✅ Optimisation terminée! Scores améliorés de +5 points en moyenne")
-            st.rerun()
\ No newline at end of file
+    # Le callback s'exécute avant le rerun du fragment: métriques et table sont à jour
+    st.button("🔄 Optimiser automatiquement les affectations", use_container_width=True,
+              on_click=_optimize_assignments, args=(state_key,))
+    
+    if st.session_state.pop(f"{state_key}_optimized", False):
+        st.success("✅ Optimisation terminée! Scores améliorés de +5 points en moyenne")
\ No newline at end of file
@@ -2,28 +2,23 @@
 Application principale Streamlit - Plateforme d'Optimisation des Examens
 """
 import streamlit as st
+import importlib
 import sys
 import os
+import logging
 from datetime import datetime
+from types import MappingProxyType
+
+# Configuration unique des logs pour toute l'application
+logging.basicConfig(level=logging.WARNING)
 
 # Ajouter le chemin du projet
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from auth import AuthenticationSystem
-from student import render_student_dashboard
-from professor import render_professor_dashboard
-from department_head import render_department_head_dashboard
 
-# Configuration de la page
-st.set_page_config(
-    page_title="🎓 Plateforme Examens Universitaires",
-    page_icon="📚",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# CSS personnalisé
-st.markdown("""
+# Blocs HTML/CSS statiques, définis une fois au chargement du module
+APP_CSS = """
     <style>
     /* Styles globaux */
     .stApp {
@@ -72,7 +67,110 @@ st.markdown("""
         }
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+LOGIN_HEADER_HTML = """
+        <div class="main-header">
+            <h1>🎓 Plateforme d'Optimisation des Emplois du Temps d'Examens</h1>
+            <p>Université • Faculté des Sciences • Gestion intelligente des examens</p>
+        </div>
+    """
+
+LOGIN_FOOTER_HTML = """
+        <div style="text-align: center; margin-top: 3rem; padding: 2rem; color: #6c757d;">
+            <p>📊 <strong>13,000+ étudiants</strong> • 🏛️ <strong>7 départements</strong> • 📚 <strong>200+ formations</strong></p>
+            <p>⚡ <strong>Optimisation automatique en &lt;45 secondes</strong></p>
+            <p style="margin-top: 1rem; font-size: 0.9rem;">© 2025 Plateforme Examens Universitaires • Tous droits réservés</p>
+        </div>
+    """
+
+# Carte de bienvenue de la sidebar: {name} et {role}
+SIDEBAR_USER_TEMPLATE = """
+            <div style="text-align: center; padding: 1rem;">
+                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                            padding: 1.5rem; border-radius: 10px; color: white; margin-bottom: 1rem;">
+                    <h3>👋 Bienvenue</h3>
+                    <p><strong>{name}</strong></p>
+                    <p><small>{role}</small></p>
+                </div>
+            </div>
+        """
+
+MAIN_FOOTER_HTML = """
+        <div style="text-align: center; margin-top: 3rem; padding: 2rem; color: #6c757d; border-top: 1px solid #dee2e6;">
+            <p><strong>Plateforme d'Optimisation des Examens Universitaires</strong></p>
+            <p>📞 Support technique: support@univ.dz • 🕒 Disponible 24/7 pendant les périodes d'examens</p>
+            <p style="font-size: 0.9rem;">v2.0 • Optimisé pour 130,000+ inscriptions • Génération de planning en &lt;45s</p>
+        </div>
+    """
+
+ROLE_TITLES = MappingProxyType({
+    'etudiant': 'Étudiant',
+    'professeur': 'Professeur',
+    'chef_departement': 'Chef de Département',
+    'admin_examens': 'Administrateur Examens',
+    'vice_doyen': 'Vice-Doyen'
+})
+
+def render_admin_placeholder():
+    """
+    Interface administrateur (en cours de développement)
+    """
+    st.warning("Interface administrateur en cours de développement")
+    st.info("Vous avez accès à toutes les fonctionnalités d'administration")
+
+def render_vice_dean_placeholder():
+    """
+    Interface vice-doyen (en cours de développement)
+    """
+    st.warning("Interface vice-doyen en cours de développement")
+    st.info("Vue stratégique globale avec tous les KPIs académiques")
+
+def render_unknown_role():
+    """
+    Rôle sans interface associée
+    """
+    st.error("Rôle non reconnu. Veuillez contacter l'administrateur.")
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _clock_strings():
+    """Date/heure et heure seule, formatées depuis le même instant (précision minute)"""
+    now = datetime.now()
+    return now.strftime("%d/%m/%Y %H:%M"), now.strftime("%H:%M")
+
+# Dashboard de chaque rôle: (module, fonction). Les modules d'interface
+# (plotly, etc.) ne sont importés qu'à la première connexion du rôle
+DASHBOARDS = MappingProxyType({
+    'etudiant': ('student', 'render_student_dashboard'),
+    'professeur': ('professor', 'render_professor_dashboard'),
+    'chef_departement': ('department_head', 'render_department_head_dashboard')
+})
+
+# Rôles sans module dédié
+PLACEHOLDER_DASHBOARDS = MappingProxyType({
+    'admin_examens': render_admin_placeholder,
+    'vice_doyen': render_vice_dean_placeholder
+})
+
+def get_dashboard(role: str):
+    """
+    Fonction d'affichage du dashboard d'un rôle (import du module à la demande)
+    """
+    if role in DASHBOARDS:
+        module_name, function_name = DASHBOARDS[role]
+        return getattr(importlib.import_module(module_name), function_name)
+    return PLACEHOLDER_DASHBOARDS.get(role, render_unknown_role)
+
+# Configuration de la page
+st.set_page_config(
+    page_title="🎓 Plateforme Examens Universitaires",
+    page_icon="📚",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# CSS personnalisé (réémis à chaque rerun: Streamlit retire les éléments non redessinés)
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 def main():
     """
@@ -102,12 +200,7 @@ def show_login_interface():
     Affiche l'interface de connexion
     """
     # Header
-    st.markdown("""
-        <div class="main-header">
-            <h1>🎓 Plateforme d'Optimisation des Emplois du Temps d'Examens</h1>
-            <p>Université • Faculté des Sciences • Gestion intelligente des examens</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(LOGIN_HEADER_HTML, unsafe_allow_html=True)
     
     # Contenu principal
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -116,32 +209,21 @@ def show_login_interface():
         AuthenticationSystem.render_login_form()
     
     # Footer
-    st.markdown("""
-        <div style="text-align: center; margin-top: 3rem; padding: 2rem; color: #6c757d;">
-            <p>📊 <strong>13,000+ étudiants</strong> • 🏛️ <strong>7 départements</strong> • 📚 <strong>200+ formations</strong></p>
-            <p>⚡ <strong>Optimisation automatique en &lt;45 secondes</strong></p>
-            <p style="margin-top: 1rem; font-size: 0.9rem;">© 2025 Plateforme Examens Universitaires • Tous droits réservés</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(LOGIN_FOOTER_HTML, unsafe_allow_html=True)
 
 def show_main_interface():
     """
     Affiche l'interface principale après connexion
     """
     user = st.session_state.user
+    date_str, hour_str = _clock_strings()
     
     # Sidebar avec informations utilisateur
     with st.sidebar:
-        st.markdown(f"""
-            <div style="text-align: center; padding: 1rem;">
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                            padding: 1.5rem; border-radius: 10px; color: white; margin-bottom: 1rem;">
-                    <h3>👋 Bienvenue</h3>
-                    <p><strong>{user.get('display_name', user['username'])}</strong></p>
-                    <p><small>{user['role'].replace('_', ' ').title()}</small></p>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
+        st.markdown(SIDEBAR_USER_TEMPLATE.format_map({
+            'name': user.get('display_name', user['username']),
+            'role': st.session_state['display_role']
+        }), unsafe_allow_html=True)
         
         # Menu de navigation
         st.markdown("### 📋 Navigation")
@@ -155,8 +237,7 @@ def show_main_interface():
         st.markdown("---")
         st.markdown("### ℹ️ Informations")
         
-        current_time = datetime.now().strftime("%d/%m/%Y %H:%M")
-        st.caption(f"Dernière activité: {current_time}")
+        st.caption(f"Dernière activité: {date_str}")
         
         # Statistiques rapides (selon le rôle)
         if user['role'] == 'etudiant':
@@ -173,50 +254,23 @@ def show_main_interface():
     col1, col2 = st.columns([4, 1])
     
     with col1:
-        role_titles = {
-            'etudiant': 'Étudiant',
-            'professeur': 'Professeur',
-            'chef_departement': 'Chef de Département',
-            'admin_examens': 'Administrateur Examens',
-            'vice_doyen': 'Vice-Doyen'
-        }
-        
-        st.title(f"🎓 Tableau de bord - {role_titles.get(user['role'], user['role'])}")
+        st.title(f"🎓 Tableau de bord - {ROLE_TITLES.get(user['role'], user['role'])}")
     
     with col2:
-        st.metric("🕒 Heure système", datetime.now().strftime("%H:%M"))
+        st.metric("🕒 Heure système", hour_str)
     
     st.markdown("---")
     
     # Afficher le dashboard selon le rôle
     try:
-        if user['role'] == 'etudiant':
-            render_student_dashboard()
-        elif user['role'] == 'professeur':
-            render_professor_dashboard()
-        elif user['role'] == 'chef_departement':
-            render_department_head_dashboard()
-        elif user['role'] == 'admin_examens':
-            st.warning("Interface administrateur en cours de développement")
-            st.info("Vous avez accès à toutes les fonctionnalités d'administration")
-        elif user['role'] == 'vice_doyen':
-            st.warning("Interface vice-doyen en cours de développement")
-            st.info("Vue stratégique globale avec tous les KPIs académiques")
-        else:
-            st.error("Rôle non reconnu. Veuillez contacter l'administrateur.")
+        get_dashboard(user['role'])()
     
     except Exception as e:
         st.error(f"Une erreur est survenue: {str(e)}")
         st.info("Veuillez rafraîchir la page ou contacter le support technique")
     
     # Footer
-    st.markdown("""
-        <div style="text-align: center; margin-top: 3rem; padding: 2rem; color: #6c757d; border-top: 1px solid #dee2e6;">
-            <p><strong>Plateforme d'Optimisation des Examens Universitaires</strong></p>
-            <p>📞 Support technique: support@univ.dz • 🕒 Disponible 24/7 pendant les périodes d'examens</p>
-            <p style="font-size: 0.9rem;">v2.0 • Optimisé pour 130,000+ inscriptions • Génération de planning en &lt;45s</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(MAIN_FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,19 +3,125 @@ Interface professeur 100% connectée à la BDD
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 import calendar
+import html
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from queries import ExamQueries, AnalyticsQueries, OptimizationQueries, UserQueries  # تم حذف ProfesseurQueries
 
 # ========== FONCTIONS UTILITAIRES ==========
+# Types appliqués aux examens à la sortie du cache
+EXAM_DTYPES = {
+    'duree_minutes': 'int32',
+    'nb_etudiants': 'int32',
+    'capacite': 'int32',
+    'taux_occupation': 'float32',
+    'statut': 'category',
+    'type_examen': 'category',
+    'formation_nom': 'category',
+    'salle_nom': 'category',
+    'module_nom': 'category'
+}
+
+# Requêtes mises en cache 1 min: les reruns (onglets, widgets) ne refont pas
+# l'aller-retour vers la base. st.cache_data renvoie une copie à chaque appel,
+# les DataFrames peuvent donc être modifiés localement sans toucher au cache
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_exams(prof_id: int, days: int):
+    """
+    Examens du professeur sur les prochains jours (cache 1 min).
+    date_heure et date_fin sont typées ici une fois pour toutes: le reste
+    du module ne reparse plus les dates
+    """
+    df = ExamQueries.get_professor_exams(prof_id, days)
+    if isinstance(df, pd.DataFrame) and not df.empty:
+        # psycopg2 renvoie des datetime: conversion directe, sans inférence de format
+        df['date_heure'] = pd.to_datetime(df['date_heure'], cache=True, errors='coerce')
+        if 'date_fin' in df.columns:
+            df['date_fin'] = pd.to_datetime(df['date_fin'], cache=True, errors='coerce')
+        else:
+            df['date_fin'] = df['date_heure'] + pd.to_timedelta(df['duree_minutes'].to_numpy(), unit='m')
+        # Colonnes TIMESTAMP sans fuseau: si le pilote renvoie des dates avec
+        # fuseau (TIMESTAMPTZ), on les ramène en UTC naïf ici, une fois, pour
+        # que to_numpy()/searchsorted et Plotly restent sur du datetime64 brut
+        for col in ('date_heure', 'date_fin'):
+            if df[col].dt.tz is not None:
+                df[col] = df[col].dt.tz_convert('UTC').dt.tz_localize(None)
+        # Types réduits: entiers 32 bits pour les mesures, catégories pour les
+        # libellés répétés (groupby et filtres sur codes entiers)
+        df = df.astype({
+            col: dtype for col, dtype in EXAM_DTYPES.items() if col in df.columns
+        }, copy=False)
+        # Tri garanti ici: les fenêtres de dates se découpent par searchsorted
+        df = df.sort_values('date_heure', kind='stable', ignore_index=True)
+    return df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_stats(prof_id: int):
+    """Statistiques du professeur (cache 1 min)"""
+    return ExamQueries.get_professor_stats(prof_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_modules(prof_id: int):
+    """Modules du professeur (cache 1 min)"""
+    return ExamQueries.get_professor_modules(prof_id)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_monthly_hours(prof_id: int):
+    """Heures de surveillance par mois, agrégées en SQL (cache 5 min)"""
+    return AnalyticsQueries.get_monthly_hours(prof_id, EXAMS_WINDOW_DAYS)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_type_distribution(prof_id: int):
+    """Répartition des examens par type (cache 5 min)"""
+    return AnalyticsQueries.get_type_distribution(prof_id, EXAMS_WINDOW_DAYS)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_formation_distribution(prof_id: int):
+    """Top 5 des formations surveillées (cache 5 min)"""
+    return AnalyticsQueries.get_formation_distribution(prof_id, EXAMS_WINDOW_DAYS)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_room_stats(prof_id: int):
+    """Utilisation des salles (cache 5 min)"""
+    return AnalyticsQueries.get_room_stats(prof_id, EXAMS_WINDOW_DAYS)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_dashboard_bundle(prof_id: int):
+    """
+    Notifications (liste + non lues, une requête) et conflits chargés en
+    parallèle pour l'en-tête et l'onglet Conflits (cache 30 s)
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        notifications = executor.submit(UserQueries.get_notifications_summary, prof_id, 'professeur', 10)
+        conflicts = executor.submit(OptimizationQueries.detect_all_conflicts, prof_id)
+        return {**notifications.result(), 'conflicts': conflicts.result()}
+
+def clear_professor_cache():
+    """
+    Invalide les données professeur en cache (bouton Actualiser)
+    """
+    _cached_exams.clear()
+    _cached_stats.clear()
+    _cached_modules.clear()
+    _cached_monthly_hours.clear()
+    _cached_type_distribution.clear()
+    _cached_formation_distribution.clear()
+    _cached_room_stats.clear()
+    export_professor_excel.clear()
+    export_professor_ics.clear()
+    load_dashboard_bundle.clear()
+
 def safe_get_exams(prof_id: int, days: int):
     """
     Récupération sécurisée des examens depuis BDD
     """
     try:
-        df = ExamQueries.get_professor_exams(prof_id, days)
+        df = _cached_exams(prof_id, days)
         return df if isinstance(df, pd.DataFrame) else pd.DataFrame()
     except Exception as e:
         st.error(f"⚠️ Erreur récupération examens: {e}")
@@ -26,7 +132,7 @@ def safe_get_stats(prof_id: int):
     Récupération sécurisée des statistiques depuis BDD
     """
     try:
-        stats = ExamQueries.get_professor_stats(prof_id)
+        stats = _cached_stats(prof_id)
         return stats if isinstance(stats, dict) else {}
     except Exception as e:
         st.error(f"⚠️ Erreur récupération stats: {e}")
@@ -37,12 +143,58 @@ def safe_get_modules(prof_id: int):
     Récupération des modules depuis BDD
     """
     try:
-        df = ExamQueries.get_professor_modules(prof_id)
+        df = _cached_modules(prof_id)
         return df if isinstance(df, pd.DataFrame) else pd.DataFrame()
     except Exception as e:
         st.error(f"⚠️ Erreur récupération modules: {e}")
         return pd.DataFrame()
 
+# Horizon de la fenêtre d'examens chargée une fois par rendu
+EXAMS_WINDOW_DAYS = 365
+
+def get_exams_window(prof_id: int):
+    """
+    Examens des 365 prochains jours (date_heure déjà en datetime64),
+    découpés localement pour chaque vue au lieu d'une requête par horizon
+    """
+    return safe_get_exams(prof_id, EXAMS_WINDOW_DAYS)
+
+def _window_bounds(df: pd.DataFrame, start=None, end=None):
+    """
+    Indices [lo, hi) des examens avec start <= date_heure < end, par recherche
+    dichotomique sur la fenêtre triée (pas de masque booléen complet)
+    """
+    values = df['date_heure'].to_numpy()
+    lo = 0 if start is None else int(np.searchsorted(values, np.datetime64(pd.Timestamp(start)), side='left'))
+    hi = len(values) if end is None else int(np.searchsorted(values, np.datetime64(pd.Timestamp(end)), side='left'))
+    return lo, max(lo, hi)
+
+def _window(df: pd.DataFrame, start=None, end=None):
+    """
+    Tranche de la fenêtre triée entre start (inclus) et end (exclu)
+    """
+    if df.empty:
+        return df
+    lo, hi = _window_bounds(df, start, end)
+    return df.iloc[lo:hi]
+
+def exams_within(df: pd.DataFrame, days: int):
+    """
+    Examens des `days` prochains jours extraits de la fenêtre annuelle
+    """
+    return _window(df, end=pd.Timestamp.now() + pd.Timedelta(days=days))
+
+# Colonnes affichées dans la liste des examens, dans l'ordre
+EXAMS_DISPLAY_COLUMNS = (
+    'date_heure', 'module_nom', 'formation_nom', 
+    'salle_nom', 'nb_etudiants', 'duree_minutes', 
+    'statut', 'type_examen', 'taux_occupation'
+)
+
+# Colonnes de survol du planning et nombre de barres au-delà duquel on les réduit
+TIMELINE_HOVER_COLUMNS = ('salle_nom', 'nb_etudiants', 'duree_minutes', 'statut', 'type_examen')
+TIMELINE_FULL_HOVER_MAX = 500
+
 # ========== DASHBOARD PRINCIPAL ==========
 def render_professor_dashboard():
     """
@@ -62,6 +214,9 @@ def render_professor_dashboard():
     
     # Récupération des données depuis BDD
     prof_stats = safe_get_stats(prof_id)
+    # Fenêtre annuelle: une seule requête, découpée pour chaque vue
+    exams_window = get_exams_window(prof_id)
+    bundle = load_dashboard_bundle(prof_id)
     
     # ========== HEADER ==========
     st.markdown(f"""
@@ -78,27 +233,35 @@ def render_professor_dashboard():
     """, unsafe_allow_html=True)
     
     # ========== KPI CARDS ==========
-    st.subheader("📊 Vue d'ensemble")
+    col_title, col_refresh = st.columns([5, 1])
+    with col_title:
+        st.subheader("📊 Vue d'ensemble")
+    with col_refresh:
+        if st.button("🔄 Actualiser", use_container_width=True):
+            clear_professor_cache()
+            st.rerun()
+    
+    # Compteurs du jour et de la semaine: une seule recherche sur les
+    # datetime64 triés (arithmétique au jour près, sans objets date Python)
+    exams_today = exams_week = 0
+    if not exams_window.empty:
+        now = np.datetime64(pd.Timestamp.now())
+        today = now.astype('datetime64[D]')
+        bounds = np.searchsorted(
+            exams_window['date_heure'].to_numpy(),
+            np.array([today, today + 1, now + np.timedelta64(7, 'D')], dtype='datetime64[ns]')
+        )
+        exams_today = int(bounds[1] - bounds[0])
+        exams_week = int(bounds[2])
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         # Examens aujourd'hui
-        df_today = safe_get_exams(prof_id, 0)
-        exams_today = 0
-        if not df_today.empty and 'date_heure' in df_today.columns:
-            try:
-                df_today['date_heure'] = pd.to_datetime(df_today['date_heure'])
-                today = datetime.now().date()
-                exams_today = len(df_today[df_today['date_heure'].dt.date == today])
-            except:
-                exams_today = 0
         st.metric("Aujourd'hui", exams_today)
     
     with col2:
         # Cette semaine
-        df_week = safe_get_exams(prof_id, 7)
-        exams_week = len(df_week) if not df_week.empty else 0
         st.metric("Cette semaine", exams_week)
     
     with col3:
@@ -113,84 +276,115 @@ def render_professor_dashboard():
     
     with col5:
         # Notifications non lues
-        unread_count = UserQueries.get_unread_notifications_count(prof_id, 'professeur')
+        unread_count = bundle['unread_count']
         st.metric("Notifications", unread_count, delta=f"{unread_count} non lues" if unread_count > 0 else None)
     
     # ========== NOTIFICATIONS RÉELLES ==========
-    notifications = UserQueries.get_notifications(prof_id, 'professeur', 10)
-    
-    if notifications:
-        with st.expander(f"🔔 Notifications ({len(notifications)})", expanded=len(notifications) > 0):
-            for notif in notifications:
-                # Icône selon le type
-                icon_map = {
-                    'rappel': '⏰',
-                    'changement': '🔄',
-                    'information': 'ℹ️',
-                    'alerte': '⚠️',
-                    'confirmation': '✅',
-                    'systeme': '⚙️'
-                }
-                icon = icon_map.get(notif.get('type_notification', '').lower(), '📌')
-                
-                # Couleur selon priorité
-                priority_color = {
-                    1: "#00aa00",  # Bas
-                    2: "#ffaa00",  # Moyen
-                    3: "#ff4444"   # Haut
-                }.get(notif.get('priority', 1), "#00aa00")
-                
-                col1, col2, col3 = st.columns([1, 8, 2])
-                with col1:
-                    st.markdown(f"<h3 style='color:{priority_color}; margin:0;'>{icon}</h3>", 
-                               unsafe_allow_html=True)
-                with col2:
-                    if not notif['is_lu']:
-                        st.markdown(f"**{notif['titre']}**")
-                        st.caption(notif['contenu'])
-                    else:
-                        st.markdown(f"✓ {notif['titre']}")
-                        st.caption(notif['contenu'])
-                with col3:
-                    if not notif['is_lu']:
-                        if st.button("✓ Lu", key=f"read_{notif['id']}"):
-                            result = UserQueries.mark_notification_as_read(notif['id'])
-                            if result:
-                                st.success("Notification marquée comme lue")
-                                st.rerun()
+    render_notifications_panel(prof_id)
     
     st.markdown("---")
     
-    # ========== TABS PRINCIPALES ==========
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "📅 Planning",
-        "📋 Examens", 
-        "📚 Modules",
-        "📊 Statistiques",
-        "⚠️ Conflits",
-        "⚙️ Gestion"
-    ])
-    
-    with tab1:
-        render_planning_tab(prof_id)
-    
-    with tab2:
-        render_exams_tab(prof_id)
-    
-    with tab3:
-        render_modules_tab(prof_id)
-    
-    with tab4:
-        render_statistics_tab(prof_id, prof_stats)
+    # ========== SECTIONS PRINCIPALES ==========
+    # Contrairement à st.tabs, qui exécute tous les onglets à chaque rerun,
+    # seule la section affichée est calculée
+    sections = {
+        "📅 Planning": lambda: render_planning_tab(prof_id, exams_window),
+        "📋 Examens": lambda: render_exams_tab(prof_id, exams_window),
+        "📚 Modules": lambda: render_modules_tab(prof_id, exams_window),
+        "📊 Statistiques": lambda: render_statistics_tab(prof_id, prof_stats, exams_window),
+        "⚠️ Conflits": lambda: render_conflicts_tab(prof_id, exams_window, bundle['conflicts']),
+        "⚙️ Gestion": lambda: render_management_tab(prof_id, exams_window)
+    }
     
-    with tab5:
-        render_conflicts_tab(prof_id)
+    section = st.radio("Section", list(sections), horizontal=True,
+                       key="professor_section", label_visibility="collapsed")
+    sections[section]()
+
+# Icône selon le type et couleur selon la priorité des notifications
+NOTIFICATION_ICONS = {
+    'rappel': '⏰',
+    'changement': '🔄',
+    'information': 'ℹ️',
+    'alerte': '⚠️',
+    'confirmation': '✅',
+    'systeme': '⚙️'
+}
+NOTIFICATION_COLORS = {
+    1: "#00aa00",  # Bas
+    2: "#ffaa00",  # Moyen
+    3: "#ff4444"   # Haut
+}
+
+def _notification_style(notif: dict):
+    """Icône et couleur d'une notification"""
+    icon = NOTIFICATION_ICONS.get((notif.get('type_notification') or '').lower(), '📌')
+    color = NOTIFICATION_COLORS.get(notif.get('priority', 1), "#00aa00")
+    return icon, color
+
+def _read_notifications_html(notifications: list) -> str:
+    """
+    Notifications déjà lues en un seul bloc HTML (aucun widget par ligne)
+    """
+    rows = []
+    for notif in notifications:
+        icon, color = _notification_style(notif)
+        rows.append(
+            f"<div style='display:flex; gap:0.8rem; align-items:flex-start; margin-bottom:0.6rem;'>"
+            f"<span style='color:{color}; font-size:1.4rem;'>{icon}</span>"
+            f"<div>✓ {html.escape(str(notif['titre']))}<br>"
+            f"<small style='opacity:0.7;'>{html.escape(str(notif['contenu']))}</small></div>"
+            f"</div>"
+        )
+    return "".join(rows)
+
+def _mark_notifications_read(notif_ids: list):
+    """
+    Callback du formulaire: marque en une requête les notifications cochées,
+    avant le rerun du fragment qui relit donc des notifications à jour
+    """
+    checked = [nid for nid in notif_ids if st.session_state.get(f"read_{nid}")]
+    if checked and UserQueries.mark_notifications_as_read(checked):
+        load_dashboard_bundle.clear()
+        st.toast(f"{len(checked)} notification(s) marquée(s) comme lue(s)")
+
+@st.fragment
+def render_notifications_panel(prof_id: int):
+    """
+    Liste des notifications: la validation ne relance que ce fragment,
+    pas tout le tableau de bord (le compteur des KPI suit au rerun suivant)
+    """
+    notifications = load_dashboard_bundle(prof_id)['notifications']
     
-    with tab6:
-        render_management_tab(prof_id)
+    if notifications:
+        unread = [notif for notif in notifications if not notif['is_lu']]
+        read = [notif for notif in notifications if notif['is_lu']]
+        
+        with st.expander(f"🔔 Notifications ({len(notifications)})", expanded=len(notifications) > 0):
+            # Seules les non lues ont des widgets, regroupés dans un formulaire
+            if unread:
+                with st.form(f"notifications_{prof_id}", border=False):
+                    for notif in unread:
+                        icon, color = _notification_style(notif)
+                        col1, col2, col3 = st.columns([1, 8, 2])
+                        with col1:
+                            st.markdown(f"<h3 style='color:{color}; margin:0;'>{icon}</h3>", 
+                                       unsafe_allow_html=True)
+                        with col2:
+                            st.markdown(f"**{notif['titre']}**")
+                            st.caption(notif['contenu'])
+                        with col3:
+                            st.checkbox("Lu", key=f"read_{notif['id']}")
+                    st.form_submit_button(
+                        "✓ Marquer comme lu",
+                        on_click=_mark_notifications_read,
+                        args=([notif['id'] for notif in unread],)
+                    )
+            
+            if read:
+                st.markdown(_read_notifications_html(read), unsafe_allow_html=True)
 
 # ========== TAB 1: PLANNING ==========
-def render_planning_tab(prof_id: int):
+def render_planning_tab(prof_id: int, exams_window: pd.DataFrame):
     """
     Planning avec données BDD
     """
@@ -212,14 +406,14 @@ def render_planning_tab(prof_id: int):
     
     # Récupération depuis BDD
     if period == "Personnalisé":
-        # Récupérer plus de données et filtrer
-        df = safe_get_exams(prof_id, 365)
-        if not df.empty and 'date_heure' in df.columns:
-            df['date_heure'] = pd.to_datetime(df['date_heure'])
-            mask = (df['date_heure'].dt.date >= start_date) & (df['date_heure'].dt.date <= end_date)
-            df = df[mask]
+        # Filtrer la fenêtre annuelle sur la période choisie
+        df = _window(
+            exams_window,
+            pd.Timestamp(start_date),
+            pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        )
     else:
-        df = safe_get_exams(prof_id, days)
+        df = exams_within(exams_window, days)
     
     if df.empty:
         st.info("🎯 Aucune surveillance prévue pour cette période")
@@ -227,22 +421,17 @@ def render_planning_tab(prof_id: int):
     
     # Timeline
     try:
-        if 'date_fin' not in df.columns and 'duree_minutes' in df.columns:
-            df['date_fin'] = pd.to_datetime(df['date_heure']) + pd.to_timedelta(df['duree_minutes'], unit='m')
-        
+        # Les examens arrivent déjà triés par date (ORDER BY de la requête);
+        # au-delà de TIMELINE_FULL_HOVER_MAX barres, le survol se limite à la
+        # salle pour alléger le JSON envoyé au navigateur
+        hover_columns = TIMELINE_HOVER_COLUMNS if len(df) <= TIMELINE_FULL_HOVER_MAX else ('salle_nom',)
         fig = px.timeline(
-            df.sort_values('date_heure'),
+            df[['date_heure', 'date_fin', 'module_nom', 'formation_nom', *hover_columns]],
             x_start="date_heure",
             x_end="date_fin",
             y="module_nom",
             color="formation_nom",
-            hover_data={
-                'salle_nom': True,
-                'nb_etudiants': True,
-                'duree_minutes': True,
-                'statut': True,
-                'type_examen': True
-            },
+            hover_data=dict.fromkeys(hover_columns, True),
             title="Planning des surveillances",
             height=500
         )
@@ -270,8 +459,12 @@ def render_calendar_view(df):
         return
     
     try:
-        # Extraire les dates
-        df['date'] = pd.to_datetime(df['date_heure']).dt.date
+        # Agrégation par jour en une passe, puis simple recherche par cellule
+        # (nombre d'étudiants seulement si la colonne est présente)
+        aggregations = {'exam_count': ('date_heure', 'size')}
+        if 'nb_etudiants' in df.columns:
+            aggregations['total_students'] = ('nb_etudiants', 'sum')
+        by_day = df.groupby(df['date_heure'].dt.date).agg(**aggregations).to_dict('index')
         
         # Calendrier du mois courant
         now = datetime.now()
@@ -297,12 +490,11 @@ def render_calendar_view(df):
                 if day == 0:
                     cols[i].write("")
                 else:
-                    day_date = datetime(year, month, day).date()
-                    day_exams = df[df['date'] == day_date]
+                    day_info = by_day.get(datetime(year, month, day).date())
                     
-                    if not day_exams.empty:
-                        exam_count = len(day_exams)
-                        total_students = day_exams['nb_etudiants'].sum() if 'nb_etudiants' in day_exams.columns else 0
+                    if day_info:
+                        exam_count = day_info['exam_count']
+                        total_students = day_info.get('total_students', 0)
                         
                         cols[i].markdown(
                             f'<div style="background-color: #4CAF50; color: white; '
@@ -320,7 +512,7 @@ def render_calendar_view(df):
         st.warning(f"Impossible d'afficher le calendrier: {e}")
 
 # ========== TAB 2: EXAMENS ==========
-def render_exams_tab(prof_id: int):
+def render_exams_tab(prof_id: int, exams_window: pd.DataFrame):
     """
     Liste détaillée des examens depuis BDD
     """
@@ -346,8 +538,8 @@ def render_exams_tab(prof_id: int):
             ["Date", "Module", "Formation", "Salle", "Étudiants"]
         )
     
-    # Récupération depuis BDD
-    df = safe_get_exams(prof_id, days)
+    # Découpage de la fenêtre annuelle
+    df = exams_within(exams_window, days)
     
     if df.empty:
         st.info("📭 Aucun examen trouvé")
@@ -371,12 +563,10 @@ def render_exams_tab(prof_id: int):
         if sort_column in df.columns:
             df = df.sort_values(sort_column, ascending=(sort_by != "Étudiants"))
     
-    # Formatage
-    display_df = df.copy()
-    
-    # Format date
-    if 'date_heure' in display_df.columns:
-        display_df['date_heure'] = pd.to_datetime(display_df['date_heure']).dt.strftime('%d/%m/%Y %H:%M')
+    # Sélection colonnes: la sélection produit déjà le DataFrame d'affichage,
+    # sans copie complète préalable; la date est formatée par column_config
+    available_cols = [col for col in EXAMS_DISPLAY_COLUMNS if col in df.columns]
+    display_df = df[available_cols]
     
     # Traduction statuts
     status_trans = {
@@ -387,23 +577,15 @@ def render_exams_tab(prof_id: int):
     }
     
     if 'statut' in display_df.columns:
-        display_df['statut'] = display_df['statut'].map(status_trans).fillna(display_df['statut'])
-    
-    # Sélection colonnes
-    available_cols = []
-    possible_cols = [
-        'date_heure', 'module_nom', 'formation_nom', 
-        'salle_nom', 'nb_etudiants', 'duree_minutes', 
-        'statut', 'type_examen', 'taux_occupation'
-    ]
-    
-    for col in possible_cols:
-        if col in display_df.columns:
-            available_cols.append(col)
+        # statut est catégoriel: seul le dictionnaire des catégories est renommé
+        categories = display_df['statut'].cat.categories
+        display_df = display_df.assign(statut=display_df['statut'].cat.rename_categories(
+            {code: label for code, label in status_trans.items() if code in categories}
+        ))
     
     # Configuration colonnes
     column_config = {
-        "date_heure": st.column_config.TextColumn("Date & Heure", width="medium"),
+        "date_heure": st.column_config.DatetimeColumn("Date & Heure", format="DD/MM/YYYY HH:mm", width="medium"),
         "module_nom": "Module",
         "formation_nom": "Formation",
         "salle_nom": "Salle",
@@ -424,7 +606,7 @@ def render_exams_tab(prof_id: int):
     
     # Éditeur de données
     edited_df = st.data_editor(
-        display_df[available_cols],
+        display_df,
         column_config=column_config,
         use_container_width=True,
         hide_index=True,
@@ -437,23 +619,9 @@ def render_exams_tab(prof_id: int):
     # Export
     if st.button("📥 Exporter vers Excel"):
         try:
-            from io import BytesIO
-            buffer = BytesIO()
-            
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Examens', index=False)
-                
-                summary = pd.DataFrame({
-                    'Statistique': ['Total examens', 'Total étudiants', 'Heures totales'],
-                    'Valeur': [len(df), df['nb_etudiants'].sum(), df['duree_minutes'].sum()/60]
-                })
-                summary.to_excel(writer, sheet_name='Résumé', index=False)
-            
-            buffer.seek(0)
-            
             st.download_button(
                 label="⬇️ Télécharger fichier Excel",
-                data=buffer,
+                data=build_exams_excel(df),
                 file_name=f"examens_professeur_{datetime.now().strftime('%Y%m%d')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 use_container_width=True
@@ -462,8 +630,27 @@ def render_exams_tab(prof_id: int):
         except Exception as e:
             st.error(f"Erreur export: {e}")
 
+@st.cache_data(ttl=300, show_spinner=False)
+def build_exams_excel(df: pd.DataFrame) -> bytes:
+    """
+    Classeur Excel des examens filtrés + résumé (octets mis en cache:
+    un second export de la même sélection ne resérialise pas le classeur)
+    """
+    buffer = BytesIO()
+    
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Examens', index=False)
+        
+        summary = pd.DataFrame({
+            'Statistique': ['Total examens', 'Total étudiants', 'Heures totales'],
+            'Valeur': [len(df), df['nb_etudiants'].sum(), df['duree_minutes'].sum()/60]
+        })
+        summary.to_excel(writer, sheet_name='Résumé', index=False)
+    
+    return buffer.getvalue()
+
 # ========== TAB 3: MODULES ==========
-def render_modules_tab(prof_id: int):
+def render_modules_tab(prof_id: int, exams_window: pd.DataFrame):
     """
     Modules dont le professeur est responsable
     """
@@ -510,39 +697,45 @@ def render_modules_tab(prof_id: int):
         if selected_semester != "Tous":
             df_modules = df_modules[df_modules['semestre'] == selected_semester]
     
+    # Examens indexés par module en un seul groupby, au lieu d'un filtre
+    # sur toute la fenêtre à chaque bouton
+    exams_by_module = (
+        dict(iter(exams_window.groupby('module_nom', observed=True)))
+        if not exams_window.empty else {}
+    )
+    
     # Afficher les modules
-    for idx, module in df_modules.iterrows():
-        with st.expander(f"📘 {module['code']} - {module['nom']}"):
+    # itertuples: un namedtuple par ligne au lieu d'une Series
+    for module in df_modules.itertuples(index=False):
+        with st.expander(f"📘 {module.code} - {module.nom}"):
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.write(f"**Semestre:** {module.get('semestre', 'N/A')}")
-                st.write(f"**Crédits:** {module.get('credits', 0)}")
-                st.write(f"**Formation:** {module.get('formation_nom', 'N/A')}")
+                st.write(f"**Semestre:** {getattr(module, 'semestre', 'N/A')}")
+                st.write(f"**Crédits:** {getattr(module, 'credits', 0)}")
+                st.write(f"**Formation:** {getattr(module, 'formation_nom', 'N/A')}")
             
             with col2:
-                st.write(f"**Code:** {module.get('code', 'N/A')}")
-                if 'nb_etudiants_inscrits' in module:
-                    st.write(f"**Étudiants:** {module['nb_etudiants_inscrits']}")
-                if 'nb_examens_planifies' in module:
-                    st.write(f"**Examens:** {module['nb_examens_planifies']}")
+                st.write(f"**Code:** {module.code}")
+                if hasattr(module, 'nb_etudiants_inscrits'):
+                    st.write(f"**Étudiants:** {module.nb_etudiants_inscrits}")
+                if hasattr(module, 'nb_examens_planifies'):
+                    st.write(f"**Examens:** {module.nb_examens_planifies}")
             
             with col3:
-                if st.button("📅 Voir examens", key=f"exams_{module['id']}"):
-                    df_all_exams = safe_get_exams(prof_id, 365)
-                    if not df_all_exams.empty:
-                        module_exams = df_all_exams[df_all_exams['module_nom'] == module['nom']]
-                        if not module_exams.empty:
-                            st.write(f"**Examens pour {module['nom']}:**")
-                            st.dataframe(module_exams[['date_heure', 'salle_nom', 'statut']])
-                        else:
-                            st.info("Aucun examen programmé")
+                if st.button("📅 Voir examens", key=f"exams_{module.id}"):
+                    module_exams = exams_by_module.get(module.nom)
+                    if module_exams is not None:
+                        st.write(f"**Examens pour {module.nom}:**")
+                        st.dataframe(module_exams[['date_heure', 'salle_nom', 'statut']])
+                    else:
+                        st.info("Aucun examen programmé")
                 
-                if st.button("📊 Statistiques", key=f"stats_{module['id']}"):
-                    st.info(f"Statistiques détaillées pour {module['nom']}")
+                if st.button("📊 Statistiques", key=f"stats_{module.id}"):
+                    st.info(f"Statistiques détaillées pour {module.nom}")
 
 # ========== TAB 4: STATISTIQUES ==========
-def render_statistics_tab(prof_id: int, prof_stats: dict):
+def render_statistics_tab(prof_id: int, prof_stats: dict, exams_window: pd.DataFrame):
     """
     Statistiques détaillées depuis BDD
     """
@@ -566,42 +759,30 @@ def render_statistics_tab(prof_id: int, prof_stats: dict):
         st.metric("Modules responsables", modules_resp)
     
     with col4:
-        df_month = safe_get_exams(prof_id, 30)
+        df_month = exams_within(exams_window, 30)
         hours_month = (df_month['duree_minutes'].sum() / 60) if not df_month.empty and 'duree_minutes' in df_month.columns else 0
         st.metric("Heures ce mois", f"{hours_month:.1f}h")
     
-    # Analyse sur l'année
-    df_year = safe_get_exams(prof_id, 365)
-    
-    if not df_year.empty:
+    # Analyse sur l'année (agrégats calculés côté SQL)
+    monthly_stats = _cached_monthly_hours(prof_id)
+    if not monthly_stats.empty:
         st.markdown("#### 📅 Analyse annuelle")
         
-        # Préparation des données
-        df_year['date_heure'] = pd.to_datetime(df_year['date_heure'])
-        df_year['mois'] = df_year['date_heure'].dt.strftime('%Y-%m')
-        df_year['semaine'] = df_year['date_heure'].dt.isocalendar().week
-        
         # Graphique 1: Évolution mensuelle
-        monthly_stats = df_year.groupby('mois').agg({
-            'nb_etudiants': 'sum',
-            'duree_minutes': 'sum',
-            'date_heure': 'count'
-        }).reset_index()
-        
-        monthly_stats['total_heures'] = monthly_stats['duree_minutes'] / 60
-        monthly_stats['mois_format'] = pd.to_datetime(monthly_stats['mois'] + '-01').dt.strftime('%b %Y')
-        
+        mean_hours = monthly_stats['total_heures'].mean()
         fig1 = px.line(
-            monthly_stats,
+            monthly_stats.assign(
+                mois_format=pd.to_datetime(monthly_stats['mois'], format='%Y-%m').dt.strftime('%b %Y')
+            ),
             x='mois_format',
             y='total_heures',
             title="Heures de surveillance par mois",
             markers=True
         )
-        fig1.add_hline(y=monthly_stats['total_heures'].mean(), 
+        fig1.add_hline(y=mean_hours, 
                       line_dash="dash", 
                       line_color="red",
-                      annotation_text=f"Moyenne: {monthly_stats['total_heures'].mean():.1f}h")
+                      annotation_text=f"Moyenne: {mean_hours:.1f}h")
         
         st.plotly_chart(fig1, use_container_width=True)
         
@@ -609,41 +790,38 @@ def render_statistics_tab(prof_id: int, prof_stats: dict):
         col1, col2 = st.columns(2)
         
         with col1:
-            if 'type_examen' in df_year.columns:
-                type_dist = df_year['type_examen'].value_counts()
+            type_dist = _cached_type_distribution(prof_id)
+            if not type_dist.empty:
                 fig2 = px.pie(
-                    values=type_dist.values,
-                    names=type_dist.index,
+                    type_dist,
+                    values='nombre',
+                    names='type_examen',
                     title="Distribution par type",
                     hole=0.4
                 )
                 st.plotly_chart(fig2, use_container_width=True)
         
         with col2:
-            if 'formation_nom' in df_year.columns:
-                formation_dist = df_year['formation_nom'].value_counts().head(5)
+            formation_dist = _cached_formation_distribution(prof_id)
+            if not formation_dist.empty:
                 fig3 = px.bar(
-                    x=formation_dist.values,
-                    y=formation_dist.index,
+                    formation_dist,
+                    x='nombre',
+                    y='formation_nom',
                     orientation='h',
                     title="Top 5 formations",
-                    labels={'x': 'Nombre', 'y': 'Formation'}
+                    labels={'nombre': 'Nombre', 'formation_nom': 'Formation'}
                 )
                 st.plotly_chart(fig3, use_container_width=True)
         
         # Analyse des salles
         st.markdown("#### 🏛️ Analyse des salles")
         
-        if 'salle_nom' in df_year.columns and 'taux_occupation' in df_year.columns:
-            room_stats = df_year.groupby('salle_nom').agg({
-                'nb_etudiants': 'sum',
-                'taux_occupation': 'mean',
-                'date_heure': 'count'
-            }).reset_index()
-            
+        room_stats = _cached_room_stats(prof_id)
+        if not room_stats.empty:
             fig4 = px.scatter(
                 room_stats,
-                x='date_heure',
+                x='nb_examens',
                 y='taux_occupation',
                 size='nb_etudiants',
                 color='salle_nom',
@@ -653,16 +831,21 @@ def render_statistics_tab(prof_id: int, prof_stats: dict):
             st.plotly_chart(fig4, use_container_width=True)
 
 # ========== TAB 5: CONFLITS ==========
-def render_conflicts_tab(prof_id: int):
+# Icônes selon sévérité
+SEVERITY_ICONS = {
+    'CRITIQUE': '🔴',
+    'ÉLEVÉ': '🟠', 
+    'MOYEN': '🟡',
+    'FAIBLE': '🟢'
+}
+
+def render_conflicts_tab(prof_id: int, exams_window: pd.DataFrame, conflicts_data):
     """
     Détection des conflits depuis BDD - VERSION CORRIGÉE
     """
     st.subheader("⚠️ Conflits et alertes")
     
     try:
-        # Récupération des conflits
-        conflicts_data = OptimizationQueries.detect_all_conflicts()
-        
         # Gestion des différents formats de retour
         if isinstance(conflicts_data, pd.DataFrame):
             conflicts_df = conflicts_data
@@ -682,28 +865,22 @@ def render_conflicts_tab(prof_id: int):
         
         # Si on a des données
         if isinstance(conflicts_df, pd.DataFrame) and not conflicts_df.empty:
-            # Filtrer les conflits du professeur
+            # Conflits déjà limités au professeur par detecter_conflits(prof_id)
             try:
-                prof_conflicts = conflicts_df[
-                    conflicts_df['details'].str.contains(str(prof_id), na=False) | 
-                    conflicts_df['type_conflit'].str.contains('Professeur', na=False)
-                ]
+                prof_conflicts = conflicts_df
                 
                 if not prof_conflicts.empty:
                     st.warning(f"🚨 {len(prof_conflicts)} conflit(s) détecté(s)")
                     
-                    for idx, conflict in prof_conflicts.iterrows():
-                        # Icônes selon sévérité
-                        severity_icon = {
-                            'CRITIQUE': '🔴',
-                            'ÉLEVÉ': '🟠', 
-                            'MOYEN': '🟡',
-                            'FAIBLE': '🟢'
-                        }.get(conflict.get('severite', 'FAIBLE'), '⚪')
+                    # itertuples: attributs d'un namedtuple, pas de Series par ligne
+                    for conflict in prof_conflicts.itertuples():
+                        idx = conflict.Index
+                        severite = getattr(conflict, 'severite', None)
+                        severity_icon = SEVERITY_ICONS.get(severite or 'FAIBLE', '⚪')
                         
-                        with st.expander(f"{severity_icon} {conflict.get('type_conflit', 'Conflit')}"):
-                            st.write(f"**Détails:** {conflict.get('details', 'Non spécifié')}")
-                            st.write(f"**Sévérité:** {conflict.get('severite', 'Non spécifié')}")
+                        with st.expander(f"{severity_icon} {getattr(conflict, 'type_conflit', 'Conflit')}"):
+                            st.write(f"**Détails:** {getattr(conflict, 'details', 'Non spécifié')}")
+                            st.write(f"**Sévérité:** {severite or 'Non spécifié'}")
                             
                             # Actions
                             col1, col2, col3 = st.columns(3)
@@ -725,7 +902,7 @@ def render_conflicts_tab(prof_id: int):
                 with st.expander("🔧 Debug - Tous les conflits"):
                     st.write(conflicts_df)
         else:
-            st.info("✅ Aucun conflit détecté dans le système")
+            st.info("✅ Aucun conflit ne vous concerne")
             
     except Exception as e:
         st.error(f"Erreur détection conflits: {e}")
@@ -734,11 +911,11 @@ def render_conflicts_tab(prof_id: int):
     # Analyse de charge personnelle
     st.markdown("#### 📊 Analyse de votre charge")
     
-    df = safe_get_exams(prof_id, 30)
+    df = exams_within(exams_window, 30)
     
     if not df.empty:
         try:
-            df['date'] = pd.to_datetime(df['date_heure']).dt.date
+            df = df.assign(date=df['date_heure'].dt.date)
             daily_load = df.groupby('date').size().reset_index(name='examens')
             
             if not daily_load.empty:
@@ -755,24 +932,118 @@ def render_conflicts_tab(prof_id: int):
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Détection surcharge
-                overload_days = daily_load[daily_load['examens'] > 3]
-                if not overload_days.empty:
-                    st.warning(f"⚠️ {len(overload_days)} jour(s) de surcharge détecté(s)")
+                # Indicateur par ligne (taille du jour) plutôt qu'un filtre par jour
+                day_size = df.groupby('date')['date'].transform('size')
+                overload_exams = df.loc[day_size > 3, ['date', 'module_nom', 'date_heure', 'salle_nom']]
+                if not overload_exams.empty:
+                    overload_groups = overload_exams.groupby('date', sort=True)
+                    st.warning(f"⚠️ {overload_groups.ngroups} jour(s) de surcharge détecté(s)")
                     
-                    for _, day in overload_days.iterrows():
-                        with st.expander(f"📅 {day['date']}: {day['examens']} examens"):
-                            day_exams = df[df['date'] == day['date']]
-                            for _, exam in day_exams.iterrows():
-                                st.write(f"• **{exam.get('module_nom', 'Module')}**")
-                                st.write(f"  🕒 {exam.get('date_heure', '').strftime('%H:%M') if hasattr(exam.get('date_heure', ''), 'strftime') else exam.get('date_heure', '')}")
-                                st.write(f"  🏛️ {exam.get('salle_nom', 'Salle')}")
+                    for day, day_exams in overload_groups:
+                        with st.expander(f"📅 {day}: {len(day_exams)} examens"):
+                            st.dataframe(
+                                day_exams.assign(heure=day_exams['date_heure'].dt.strftime('%H:%M'))[
+                                    ['module_nom', 'heure', 'salle_nom']
+                                ],
+                                column_config={
+                                    'module_nom': 'Module',
+                                    'heure': 'Heure',
+                                    'salle_nom': 'Salle'
+                                },
+                                hide_index=True,
+                                use_container_width=True
+                            )
         except Exception as e:
             st.error(f"Erreur analyse charge: {e}")
     else:
         st.info("📭 Aucun examen trouvé pour l'analyse de charge")
 
+# Horizons (jours) du résumé de l'export Excel
+EXPORT_PERIODS = (30, 90, 365)
+
+def period_totals(df: pd.DataFrame, periods=EXPORT_PERIODS):
+    """
+    Nombre d'examens et heures cumulées pour chaque horizon, en une passe:
+    somme cumulée des durées lue aux bornes trouvées par searchsorted
+    """
+    now = pd.Timestamp.now()
+    bounds = np.searchsorted(
+        df['date_heure'].to_numpy(),
+        np.array([np.datetime64(now + pd.Timedelta(days=days)) for days in periods], dtype='datetime64[ns]')
+    )
+    cumulated = np.concatenate(([0], np.cumsum(df['duree_minutes'].to_numpy(dtype='int64'))))
+    return pd.DataFrame({
+        'Période': [f"{days} jours" for days in periods],
+        'Examens': bounds,
+        'Heures': cumulated[bounds] / 60
+    })
+
+def build_professor_stats_excel(df: pd.DataFrame) -> bytes:
+    """
+    Classeur Excel de la fenêtre annuelle + résumé par horizon
+    """
+    buffer = BytesIO()
+    
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Examens', index=False)
+        period_totals(df).to_excel(writer, sheet_name='Statistiques', index=False)
+    
+    return buffer.getvalue()
+
+# Format des dates iCal (heure locale flottante)
+ICS_DATE_FORMAT = '%Y%m%dT%H%M%S'
+
+# Valeurs par défaut des champs d'un événement iCal
+ICS_DEFAULTS = {
+    'module_nom': 'Examen',
+    'salle_nom': 'Salle',
+    'formation_nom': '',
+    'nb_etudiants': 0,
+    'duree_minutes': 0
+}
+
+def build_exams_ics(df: pd.DataFrame) -> str:
+    """
+    Fichier iCal des examens: valeurs par défaut et dates appliquées par
+    colonne entière, un seul f-string par événement, lignes jointes en CRLF
+    (RFC 5545)
+    """
+    fields = [
+        df[col].astype(object).fillna(default) for col, default in ICS_DEFAULTS.items()
+    ]
+    starts = df['date_heure'].dt.strftime(ICS_DATE_FORMAT)
+    ends = df['date_fin'].dt.strftime(ICS_DATE_FORMAT)
+    
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Plateforme Examens//FR"]
+    lines.extend(
+        f"BEGIN:VEVENT\r\n"
+        f"SUMMARY:{module}\r\n"
+        f"LOCATION:{salle}\r\n"
+        f"DESCRIPTION:Formation: {formation}\\nÉtudiants: {nb_etudiants}\\nDurée: {duree} minutes\r\n"
+        f"DTSTART:{start}\r\n"
+        f"DTEND:{end}\r\n"
+        f"END:VEVENT"
+        for module, salle, formation, nb_etudiants, duree, start, end in zip(*fields, starts, ends)
+    )
+    lines.append("END:VCALENDAR")
+    
+    return "\r\n".join(lines) + "\r\n"
+
+# Exports en cache par (professeur, jour): la clé ne hache pas la fenêtre
+# d'examens et les clics répétés réutilisent les octets déjà générés
+@st.cache_data(ttl=300, show_spinner=False)
+def export_professor_excel(prof_id: int, day: date) -> bytes:
+    """Classeur Excel des statistiques du professeur"""
+    return build_professor_stats_excel(get_exams_window(prof_id))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def export_professor_ics(prof_id: int, day: date) -> bytes:
+    """Fichier iCal des 90 prochains jours (vide si aucun examen)"""
+    df_calendar = exams_within(get_exams_window(prof_id), 90)
+    return build_exams_ics(df_calendar).encode('utf-8') if not df_calendar.empty else b""
+
 # ========== TAB 6: GESTION ==========
-def render_management_tab(prof_id: int):
+def render_management_tab(prof_id: int, exams_window: pd.DataFrame):
     """
     Gestion des préférences et indisponibilités
     """
@@ -874,36 +1145,11 @@ def render_management_tab(prof_id: int):
     
     with col2:
         if st.button("📊 Statistiques Excel", use_container_width=True):
-            df_exams = safe_get_exams(prof_id, 365)
-            if not df_exams.empty:
+            if not exams_window.empty:
                 try:
-                    from io import BytesIO
-                    buffer = BytesIO()
-                    
-                    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                        df_exams.to_excel(writer, sheet_name='Examens', index=False)
-                        
-                        stats_data = {
-                            'Période': ['30 jours', '90 jours', '365 jours'],
-                            'Examens': [
-                                len(safe_get_exams(prof_id, 30)),
-                                len(safe_get_exams(prof_id, 90)),
-                                len(df_exams)
-                            ],
-                            'Heures': [
-                                safe_get_exams(prof_id, 30)['duree_minutes'].sum()/60,
-                                safe_get_exams(prof_id, 90)['duree_minutes'].sum()/60,
-                                df_exams['duree_minutes'].sum()/60
-                            ]
-                        }
-                        stats_df = pd.DataFrame(stats_data)
-                        stats_df.to_excel(writer, sheet_name='Statistiques', index=False)
-                    
-                    buffer.seek(0)
-                    
                     st.download_button(
                         label="⬇️ Télécharger Excel",
-                        data=buffer,
+                        data=export_professor_excel(prof_id, date.today()),
                         file_name=f"donnees_professeur_{datetime.now().strftime('%Y%m%d')}.xlsx",
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         use_container_width=True
@@ -913,28 +1159,8 @@ def render_management_tab(prof_id: int):
     
     with col3:
         if st.button("🗓️ Fichier iCal", use_container_width=True):
-            df_calendar = safe_get_exams(prof_id, 90)
-            if not df_calendar.empty:
-                ics_content = "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//Plateforme Examens//FR\n"
-                
-                for _, exam in df_calendar.iterrows():
-                    ics_content += "BEGIN:VEVENT\n"
-                    ics_content += f"SUMMARY:{exam.get('module_nom', 'Examen')}\n"
-                    ics_content += f"LOCATION:{exam.get('salle_nom', 'Salle')}\n"
-                    ics_content += f"DESCRIPTION:Formation: {exam.get('formation_nom', '')}\\n"
-                    ics_content += f"Étudiants: {exam.get('nb_etudiants', 0)}\\n"
-                    ics_content += f"Durée: {exam.get('duree_minutes', 0)} minutes\n"
-                    
-                    if 'date_heure' in exam:
-                        start_dt = pd.to_datetime(exam['date_heure'])
-                        end_dt = start_dt + timedelta(minutes=exam.get('duree_minutes', 0))
-                        ics_content += f"DTSTART:{start_dt.strftime('%Y%m%dT%H%M%S')}\n"
-                        ics_content += f"DTEND:{end_dt.strftime('%Y%m%dT%H%M%S')}\n"
-                    
-                    ics_content += "END:VEVENT\n"
-                
-                ics_content += "END:VCALENDAR"
-                
+            ics_content = export_professor_ics(prof_id, date.today())
+            if ics_content:
                 st.download_button(
                     label="⬇️ Télécharger iCal",
                     data=ics_content,
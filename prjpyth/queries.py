@@ -5,7 +5,7 @@ VERSION CORRIGÉE - Problèmes d'authentification résolus
 from typing import Optional, List, Dict, Any
 import pandas as pd
 from datetime import datetime, date, timedelta
-from connection import execute_query, load_dataframe
+from connection import execute_query, execute_many, load_dataframe
 
 
 class ExamQueries:
@@ -297,15 +297,109 @@ class AnalyticsQueries:
         """
         result = load_dataframe(query, (department_id,))
         return result if not result.empty else pd.DataFrame()
+    
+    @staticmethod
+    def get_monthly_hours(professor_id: int, days_ahead: int = 365) -> pd.DataFrame:
+        """
+        Heures de surveillance par mois d'un professeur (agrégées en SQL)
+        """
+        query = """
+            SELECT 
+                TO_CHAR(DATE_TRUNC('month', e.date_heure), 'YYYY-MM') as mois,
+                ROUND(SUM(e.duree_minutes) / 60.0, 2) as total_heures,
+                COUNT(*) as nb_examens
+            FROM examens e
+            WHERE e.professeur_id = %s
+                AND e.date_heure BETWEEN CURRENT_TIMESTAMP AND CURRENT_TIMESTAMP + %s * INTERVAL '1 day'
+                AND e.statut IN ('Planifie', 'Confirme')
+            GROUP BY 1
+            ORDER BY 1
+        """
+        result = load_dataframe(query, (professor_id, days_ahead))
+        return result if not result.empty else pd.DataFrame()
+    
+    @staticmethod
+    def get_type_distribution(professor_id: int, days_ahead: int = 365) -> pd.DataFrame:
+        """
+        Nombre d'examens par type pour un professeur
+        """
+        query = """
+            SELECT 
+                e.type_examen,
+                COUNT(*) as nombre
+            FROM examens e
+            WHERE e.professeur_id = %s
+                AND e.date_heure BETWEEN CURRENT_TIMESTAMP AND CURRENT_TIMESTAMP + %s * INTERVAL '1 day'
+                AND e.statut IN ('Planifie', 'Confirme')
+            GROUP BY e.type_examen
+            ORDER BY nombre DESC
+        """
+        result = load_dataframe(query, (professor_id, days_ahead))
+        return result if not result.empty else pd.DataFrame()
+    
+    @staticmethod
+    def get_formation_distribution(professor_id: int, days_ahead: int = 365, limit: int = 5) -> pd.DataFrame:
+        """
+        Formations les plus surveillées par un professeur
+        """
+        query = """
+            SELECT 
+                f.nom as formation_nom,
+                COUNT(*) as nombre
+            FROM examens e
+            JOIN modules m ON e.module_id = m.id
+            JOIN formations f ON m.formation_id = f.id
+            WHERE e.professeur_id = %s
+                AND e.date_heure BETWEEN CURRENT_TIMESTAMP AND CURRENT_TIMESTAMP + %s * INTERVAL '1 day'
+                AND e.statut IN ('Planifie', 'Confirme')
+            GROUP BY f.nom
+            ORDER BY nombre DESC
+            LIMIT %s
+        """
+        result = load_dataframe(query, (professor_id, days_ahead, limit))
+        return result if not result.empty else pd.DataFrame()
+    
+    @staticmethod
+    def get_room_stats(professor_id: int, days_ahead: int = 365) -> pd.DataFrame:
+        """
+        Utilisation des salles (examens, étudiants, taux moyen) pour un professeur
+        """
+        query = """
+            WITH exam_load AS (
+                SELECT 
+                    e.id,
+                    e.salle_id,
+                    COUNT(i.etudiant_id) as nb_etudiants
+                FROM examens e
+                LEFT JOIN inscriptions i ON e.module_id = i.module_id AND i.statut = 'Inscrit'
+                WHERE e.professeur_id = %s
+                    AND e.date_heure BETWEEN CURRENT_TIMESTAMP AND CURRENT_TIMESTAMP + %s * INTERVAL '1 day'
+                    AND e.statut IN ('Planifie', 'Confirme')
+                GROUP BY e.id, e.salle_id
+            )
+            SELECT 
+                l.nom as salle_nom,
+                COUNT(*) as nb_examens,
+                SUM(el.nb_etudiants) as nb_etudiants,
+                ROUND(AVG(el.nb_etudiants::DECIMAL / l.capacite * 100), 2) as taux_occupation
+            FROM exam_load el
+            JOIN lieux_examen l ON el.salle_id = l.id
+            GROUP BY l.nom
+            ORDER BY nb_examens DESC
+        """
+        result = load_dataframe(query, (professor_id, days_ahead))
+        return result if not result.empty else pd.DataFrame()
 
 
 class OptimizationQueries:
     """Requêtes pour l'optimisation automatique"""
     
     @staticmethod
-    def generate_optimized_schedule(start_date: date, end_date: date, department_id: int = None) -> pd.DataFrame:
+    def generate_optimized_schedule(start_date: date, end_date: date, department_id: int = None,
+                                    timeout_s: int = None) -> pd.DataFrame:
         """
         Génère un planning optimisé en utilisant la fonction PL/pgSQL
+        (timeout_s: durée maximale de la requête, au-delà du défaut du pool)
         """
         if department_id:
             query = """
@@ -323,20 +417,21 @@ class OptimizationQueries:
             query = "SELECT * FROM generer_planning_optimise(%s, %s) ORDER BY score_optimisation DESC"
             params = (start_date, end_date)
         
-        result = load_dataframe(query, params)
+        result = load_dataframe(query, params, timeout_s=timeout_s)
         return result if not result.empty else pd.DataFrame()
     
    
     
     @staticmethod
-    def detect_all_conflicts() -> pd.DataFrame:
+    def detect_all_conflicts(professor_id: int = None) -> pd.DataFrame:
         """
         Détecte tous les conflits dans le planning actuel
+        (ou seulement ceux des examens d'un professeur, filtrés en SQL)
         VERSION CORRIGÉE - Retourne toujours un DataFrame
         """
         try:
-            query = "SELECT * FROM detecter_conflits() ORDER BY severite"
-            result = load_dataframe(query)
+            query = "SELECT * FROM detecter_conflits(%s) ORDER BY severite"
+            result = load_dataframe(query, (professor_id,))
             
             # Assurer que nous retournons toujours un DataFrame
             if result is None:
@@ -630,6 +725,20 @@ class UserQueries:
             print(f"Erreur dans mark_notification_as_read: {e}")
             return 0
     
+    @staticmethod
+    def mark_notifications_as_read(notification_ids: List[int]) -> int:
+        """
+        Marque plusieurs notifications comme lues en une seule requête
+        """
+        if not notification_ids:
+            return 0
+        query = """
+            UPDATE notifications n SET is_lu = TRUE
+            FROM (VALUES %s) AS v(id)
+            WHERE n.id = v.id
+        """
+        return execute_many(query, [(nid,) for nid in notification_ids])
+    
     @staticmethod
     def add_notification(user_id: int, user_role: str, type_notif: str, 
                         titre: str, contenu: str, priority: int = 1) -> List:
@@ -668,6 +777,50 @@ class UserQueries:
             print(f"Erreur dans get_unread_notifications_count: {e}")
             return 0
     
+    @staticmethod
+    def get_notifications_summary(user_id: int, user_role: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Notifications récentes et nombre de non lues en un seul aller-retour
+        """
+        try:
+            query = """
+                WITH unread AS (
+                    SELECT COUNT(*) as unread_count
+                    FROM notifications
+                    WHERE (user_id = %s OR user_role = %s)
+                        AND is_lu = FALSE
+                        AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+                )
+                SELECT 
+                    unread.unread_count,
+                    n.id,
+                    n.type_notification,
+                    n.titre,
+                    n.contenu,
+                    n.is_lu,
+                    n.created_at,
+                    n.priority
+                FROM unread
+                LEFT JOIN LATERAL (
+                    SELECT id, type_notification, titre, contenu, is_lu, created_at, priority
+                    FROM notifications
+                    WHERE user_id = %s OR user_role = %s
+                    ORDER BY priority DESC, created_at DESC
+                    LIMIT %s
+                ) n ON TRUE
+            """
+            rows = execute_query(query, (user_id, user_role, user_id, user_role, limit)) or []
+            unread_count = rows[0]['unread_count'] if rows else 0
+            # Sans notification, la jointure renvoie une ligne avec id NULL
+            notifications = [
+                {key: value for key, value in row.items() if key != 'unread_count'}
+                for row in rows if row['id'] is not None
+            ]
+            return {'unread_count': unread_count, 'notifications': notifications}
+        except Exception as e:
+            print(f"Erreur dans get_notifications_summary: {e}")
+            return {'unread_count': 0, 'notifications': []}
+    
     @staticmethod
     def get_professor_availability(professor_id: int, start_date: date, end_date: date) -> List[Dict]:
         """
@@ -3,11 +3,69 @@ Interface étudiant moderne avec fonctionnalités avancées
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from queries import ExamQueries, AnalyticsQueries
 import calendar
+import html
+
+# Examens mis en cache 5 min: chaque clic relance le script, mais les
+# onglets et l'en-tête ne refont plus la requête. st.cache_data renvoie une
+# copie, les vues peuvent ajouter des colonnes sans toucher au cache
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_student_exams(student_id: int, start_date=None, end_date=None,
+                          columns: tuple = None) -> pd.DataFrame:
+    """
+    Examens de l'étudiant sur la période (toutes dates si non précisée).
+    Si `columns` est donné, seules ces colonnes sont construites.
+    date_heure et date_fin sont converties ici une seule fois
+    """
+    exams = ExamQueries.get_student_exams(student_id, start_date, end_date)
+    df = pd.DataFrame(exams, columns=list(columns) if columns else None)
+    if not df.empty:
+        for col in ('date_heure', 'date_fin'):
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col])
+    return df
+
+# Colonnes utilisées par le planning personnel (timeline, calendrier, liste)
+_SCHED_COLS = (
+    'date_heure', 'date_fin', 'module_nom', 'salle_nom', 'professeur_nom',
+    'duree_minutes', 'type_examen', 'statut', 'departement_nom', 'taux_occupation'
+)
+
+WEEKDAY_LABELS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+def _weekly_load_matrix(dates: np.ndarray):
+    """
+    Nombre d'examens par (semaine ISO, jour de la semaine) en NumPy:
+    arithmétique sur les jours datetime64, sans formatage de dates.
+    Les lignes sont les semaines de la période dans l'ordre chronologique,
+    libellées « année ISO-Snn »
+    """
+    days = dates.astype('datetime64[D]')
+    # 1970-01-01 est un jeudi: lundi = 0
+    weekday = (days.astype('int64') + 3) % 7
+    monday = days - weekday
+    
+    # Toutes les semaines de la période, y compris celles sans examen
+    first_monday = monday.min()
+    n_weeks = int((monday.max() - first_monday).astype('int64')) // 7 + 1
+    row = (monday - first_monday).astype('int64') // 7
+    load = np.zeros((n_weeks, 7), dtype=np.int32)
+    np.add.at(load, (row, weekday), 1)
+    
+    # Année et numéro ISO: ceux du jeudi de chaque semaine
+    thursdays = first_monday + 7 * np.arange(n_weeks) + 3
+    iso_years = thursdays.astype('datetime64[Y]')
+    iso_weeks = (thursdays - iso_years.astype('datetime64[D]')).astype('int64') // 7 + 1
+    labels = [
+        f"{year}-S{week:02d}"
+        for year, week in zip(iso_years.astype('int64') + 1970, iso_weeks)
+    ]
+    return labels, load
 
 def render_student_dashboard():
     """
@@ -28,20 +86,19 @@ def render_student_dashboard():
             </div>
         """, unsafe_allow_html=True)
     
+    # Une seule requête (en cache) pour les deux indicateurs
+    today = datetime.now().date()
+    week_exams = _cached_student_exams(student_info['linked_id'], today, today + timedelta(days=7))
+    
     with col2:
-        today = datetime.now().date()
-        exams_today = len([e for e in ExamQueries.get_student_exams(
-            student_info['linked_id'], today, today
-        )])
+        exams_today = 0
+        if not week_exams.empty:
+            exams_today = int((week_exams['date_heure'].dt.date == today).sum())
         
         st.metric("📅 Examens aujourd'hui", exams_today)
     
     with col3:
-        next_7_days = len(ExamQueries.get_student_exams(
-            student_info['linked_id'], 
-            today, 
-            today + timedelta(days=7)
-        ))
+        next_7_days = len(week_exams)
         st.metric("📆 7 prochains jours", next_7_days)
     
     st.markdown("---")
@@ -66,6 +123,50 @@ def render_student_dashboard():
     with tab4:
         render_notifications(student_info['linked_id'])
 
+# Affichage des dates du planning dans les tableaux
+SCHEDULE_COLUMN_CONFIG = {
+    'date_heure': st.column_config.DatetimeColumn("date_heure", format="DD/MM/YYYY HH:mm")
+}
+
+def _schedule_timeline_fig(df: pd.DataFrame) -> go.Figure:
+    """
+    Timeline des examens en barres horizontales go.Bar (équivalent de
+    px.timeline): seules les colonnes tracées sont envoyées, les dates en
+    millisecondes epoch plutôt qu'en chaînes ISO
+    """
+    colors = px.colors.qualitative.Plotly
+    start_ms = df['date_heure'].to_numpy().astype('datetime64[ms]').astype('int64')
+    duration_ms = (df['date_fin'] - df['date_heure']).to_numpy().astype('timedelta64[ms]').astype('int64')
+    # Heure de fin pour le survol (le début est formaté par Plotly via %{base})
+    end_labels = df['date_fin'].dt.strftime('%H:%M').to_numpy()
+    
+    fig = go.Figure()
+    for i, (departement, idx) in enumerate(df.groupby('departement_nom', sort=False).indices.items()):
+        fig.add_trace(go.Bar(
+            base=start_ms[idx],
+            x=duration_ms[idx],
+            y=df['module_nom'].to_numpy()[idx],
+            orientation='h',
+            name=departement,
+            marker_color=colors[i % len(colors)],
+            customdata=np.column_stack((
+                df['salle_nom'].to_numpy()[idx],
+                df['professeur_nom'].to_numpy()[idx],
+                df['taux_occupation'].to_numpy()[idx],
+                end_labels[idx]
+            )),
+            hovertemplate=(
+                "<b>%{y}</b><br>%{base|%d/%m %H:%M} - %{customdata[3]}<br>"
+                "Salle: %{customdata[0]}<br>"
+                "Professeur: %{customdata[1]}<br>Occupation: %{customdata[2]}%"
+                "<extra>%{fullData.name}</extra>"
+            )
+        ))
+    fig.update_layout(title="📅 Planning de vos examens", barmode='overlay',
+                      xaxis_type='date', legend_title_text="Département")
+    fig.update_yaxes(autorange='reversed')
+    return fig
+
 def render_personal_schedule(student_id: int):
     """
     Affiche le planning personnel de l'étudiant
@@ -83,30 +184,15 @@ def render_personal_schedule(student_id: int):
                                 ["Timeline", "Calendrier", "Liste"])
     
     # Récupérer les examens
-    exams = ExamQueries.get_student_exams(student_id, start_date, end_date)
+    df = _cached_student_exams(student_id, start_date, end_date, _SCHED_COLS)
     
-    if not exams:
+    if df.empty:
         st.info("🎉 Aucun examen prévu pour cette période")
         return
     
-    df = pd.DataFrame(exams)
-    
     if view_type == "Timeline":
         # Timeline interactive
-        fig = px.timeline(
-            df,
-            x_start="date_heure",
-            x_end="date_fin",
-            y="module_nom",
-            color="departement_nom",
-            hover_data=["salle_nom", "professeur_nom", "taux_occupation"],
-            title="📅 Planning de vos examens",
-            labels={
-                "date_heure": "Date et Heure",
-                "module_nom": "Module",
-                "departement_nom": "Département"
-            }
-        )
+        fig = _schedule_timeline_fig(df)
         fig.update_layout(
             height=500,
             xaxis_title="",
@@ -118,40 +204,42 @@ def render_personal_schedule(student_id: int):
         
         # Liste détaillée
         st.subheader("📋 Détail des examens")
-        display_df = df[[
+        # Dates formatées par le navigateur: pas de strftime côté Python
+        st.dataframe(df.loc[:, [
             'date_heure', 'module_nom', 'salle_nom', 
             'professeur_nom', 'duree_minutes', 'type_examen'
-        ]].copy()
-        display_df['date_heure'] = pd.to_datetime(display_df['date_heure']).dt.strftime('%d/%m/%Y %H:%M')
-        st.dataframe(display_df, use_container_width=True)
+        ]], column_config=SCHEDULE_COLUMN_CONFIG, use_container_width=True)
     
     elif view_type == "Calendrier":
         # Vue calendrier
-        df['jour'] = pd.to_datetime(df['date_heure']).dt.date
-        df['heure'] = pd.to_datetime(df['date_heure']).dt.strftime('%H:%M')
+        df['jour'] = df['date_heure'].dt.date
+        df['heure'] = df['date_heure'].dt.strftime('%H:%M')
         
-        # Grouper par jour
-        daily_exams = df.groupby('jour').agg({
-            'module_nom': list,
-            'salle_nom': list,
-            'heure': list
-        }).reset_index()
-        
-        for _, row in daily_exams.iterrows():
-            with st.expander(f"📅 {row['jour'].strftime('%A %d %B %Y')}"):
-                for i, module in enumerate(row['module_nom']):
-                    st.markdown(f"""
+        # Grouper par jour: les lignes de chaque groupe restent alignées,
+        # un seul bloc HTML par jour
+        for jour, group in df.groupby('jour', sort=True):
+            with st.expander(f"📅 {jour.strftime('%A %d %B %Y')}"):
+                parts = []
+                for module, salle, heure in zip(group['module_nom'], group['salle_nom'], group['heure']):
+                    parts.append(f"""
                         <div style="background: #f8f9fa; padding: 1rem; margin: 0.5rem 0; border-radius: 5px; border-left: 4px solid #667eea;">
-                            <strong>🕒 {row['heure'][i]}</strong> • <strong>{module}</strong><br>
-                            📍 {row['salle_nom'][i]}
+                            <strong>🕒 {heure}</strong> • <strong>{module}</strong><br>
+                            📍 {salle}
                         </div>
-                    """, unsafe_allow_html=True)
+                    """)
+                st.markdown("".join(parts), unsafe_allow_html=True)
     
     else:  # Liste
-        st.dataframe(df[[
+        st.dataframe(df.loc[:, [
             'date_heure', 'module_nom', 'salle_nom', 
             'professeur_nom', 'duree_minutes', 'type_examen', 'statut'
-        ]], use_container_width=True)
+        ]], column_config=SCHEDULE_COLUMN_CONFIG, use_container_width=True)
+
+# Conseils d'accès selon le nom de la salle
+ROOM_HINTS = {
+    'Amphi': "Les amphithéâtres sont au rez-de-chaussée du bâtiment central",
+    'Salle': "Vérifiez l'étage dans le nom de la salle (ex: Salle 201 = 2ème étage)"
+}
 
 def render_room_view(student_id: int):
     """
@@ -160,18 +248,16 @@ def render_room_view(student_id: int):
     st.subheader("🗺️ Localisation de vos examens")
     
     # Récupérer les salles pour les prochains examens
-    exams = ExamQueries.get_student_exams(
+    df = _cached_student_exams(
         student_id, 
         datetime.now().date(), 
         datetime.now().date() + timedelta(days=14)
     )
     
-    if not exams:
+    if df.empty:
         st.info("Aucun examen prévu dans les 14 prochains jours")
         return
     
-    df = pd.DataFrame(exams)
-    
     # Carte des salles
     col1, col2 = st.columns([2, 1])
     
@@ -209,33 +295,89 @@ def render_room_view(student_id: int):
     
     with col2:
         st.markdown("### 📍 Détails des salles")
-        for _, exam in df.iterrows():
-            with st.expander(f"{exam['salle_nom']} - {exam['date_heure'].strftime('%d/%m %H:%M')}"):
-                st.markdown(f"""
-                    **Module:** {exam['module_nom']}<br>
-                    **Type de salle:** {exam['salle_type']}<br>
-                    **Capacité:** {exam.get('capacite', 'N/A')} places<br>
-                    **Occupation:** {exam.get('taux_occupation', 'N/A')}%<br>
-                    **Bâtiment:** {exam['batiment']}
-                """, unsafe_allow_html=True)
-                
-                if 'Amphi' in exam['salle_nom']:
-                    st.info("💡 Les amphithéâtres sont au rez-de-chaussée du bâtiment central")
-                elif 'Salle' in exam['salle_nom']:
-                    st.info("💡 Vérifiez l'étage dans le nom de la salle (ex: Salle 201 = 2ème étage)")
+        # Un seul bloc HTML (<details> natif) au lieu d'un expander par examen
+        hints = np.select(
+            [df['salle_nom'].str.contains('Amphi', regex=False),
+             df['salle_nom'].str.contains('Salle', regex=False)],
+            [ROOM_HINTS['Amphi'], ROOM_HINTS['Salle']],
+            default=''
+        )
+        labels = df['date_heure'].dt.strftime('%d/%m %H:%M')
+        # Tout champ interpolé est échappé (rendu avec unsafe_allow_html)
+        esc = lambda value: html.escape(str(value))
+        parts = []
+        for exam, label, hint in zip(df.itertuples(index=False), labels, hints):
+            hint_html = (
+                f"<div style='background:#e8f4fd; padding:0.5rem; border-radius:5px; margin-top:0.5rem;'>💡 {esc(hint)}</div>"
+                if hint else ""
+            )
+            parts.append(f"""<details style="border:1px solid #ddd; border-radius:5px; padding:0.5rem; margin-bottom:0.5rem;">
+<summary>{esc(exam.salle_nom)} - {esc(label)}</summary>
+<b>Module:</b> {esc(exam.module_nom)}<br>
+<b>Type de salle:</b> {esc(exam.salle_type)}<br>
+<b>Capacité:</b> {esc(exam.capacite)} places<br>
+<b>Occupation:</b> {esc(exam.taux_occupation)}%<br>
+<b>Bâtiment:</b> {esc(exam.batiment)}{hint_html}
+</details>""")
+        st.markdown("".join(parts), unsafe_allow_html=True)
+
+# Figures des statistiques en cache: entrées hachables (tuples, tableau
+# NumPy), un rerun sur les mêmes examens réutilise la figure construite
+@st.cache_data(ttl=600, show_spinner=False)
+def _build_type_pie_fig(type_counts: tuple):
+    """Répartition par type d'examen, depuis des paires (type, nombre)"""
+    names, values = zip(*type_counts) if type_counts else ((), ())
+    fig1 = px.pie(
+        values=list(values),
+        names=list(names),
+        title="Répartition par type d'examen",
+        hole=0.4
+    )
+    fig1.update_traces(textposition='inside', textinfo='percent+label')
+    return fig1
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _build_weekly_load_fig(weekly_counts: tuple):
+    """Nombre d'examens par semaine, depuis des paires (« année-Snn », nombre)"""
+    weeks, counts = zip(*weekly_counts) if weekly_counts else ((), ())
+    fig2 = px.bar(
+        x=list(weeks),
+        y=list(counts),
+        title="Nombre d'examens par semaine",
+        labels={'x': 'Semaine', 'y': "Nombre d'examens"}
+    )
+    fig2.update_layout(xaxis_type='category')
+    return fig2
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _build_load_heatmap_fig(dates: np.ndarray):
+    """Charge par semaine ISO et jour de la semaine"""
+    weeks, load = _weekly_load_matrix(dates)
+    
+    fig3 = go.Figure(go.Heatmap(
+        z=load,
+        x=WEEKDAY_LABELS,
+        y=weeks,
+        colorscale='Viridis',
+        colorbar=dict(title="Examens")
+    ))
+    fig3.update_layout(
+        title="Charge d'examens par jour de la semaine",
+        yaxis_title="Semaine",
+        yaxis_type='category'
+    )
+    return fig3
 
 def render_student_statistics(student_id: int):
     """
     Affiche les statistiques personnelles de l'étudiant
     """
-    all_exams = ExamQueries.get_student_exams(student_id)
+    df = _cached_student_exams(student_id)
     
-    if not all_exams:
+    if df.empty:
         st.info("Aucune donnée statistique disponible")
         return
     
-    df = pd.DataFrame(all_exams)
-    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -251,57 +393,41 @@ def render_student_statistics(student_id: int):
         st.metric("✅ Terminés", completed)
     
     with col4:
-        upcoming = len(df[df['date_heure'] > datetime.now()])
+        upcoming = len(df[df['date_heure'] > pd.Timestamp.now()])
         st.metric("📅 À venir", upcoming)
     
     st.markdown("---")
     
     col1, col2 = st.columns(2)
     
+    # Un seul groupby (type, semaine), marginalisé pour les deux graphiques
+    # Semaine ISO identifiée par (année ISO, numéro): pas de fusion entre
+    # années, ordre chronologique au passage du nouvel an
+    iso = df['date_heure'].dt.isocalendar()
+    type_week = df.groupby(
+        [df['type_examen'], iso['year'], iso['week']],
+        observed=True
+    ).size()
+    
     with col1:
-        type_dist = df['type_examen'].value_counts()
-        fig1 = px.pie(
-            values=type_dist.values,
-            names=type_dist.index,
-            title="Répartition par type d'examen",
-            hole=0.4
-        )
-        fig1.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig1, use_container_width=True)
+        type_dist = type_week.groupby(level=0).sum().sort_values(ascending=False)
+        st.plotly_chart(_build_type_pie_fig(tuple(type_dist.items())), use_container_width=True)
     
     with col2:
-        df['semaine'] = pd.to_datetime(df['date_heure']).dt.isocalendar().week
-        weekly_load = df.groupby('semaine').size()
-        
-        fig2 = px.bar(
-            x=weekly_load.index,
-            y=weekly_load.values,
-            title="Nombre d'examens par semaine",
-            labels={'x': 'Semaine', 'y': "Nombre d'examens"}
+        weekly_load = type_week.groupby(level=['year', 'week']).sum()
+        weekly_counts = tuple(
+            (f"{year}-S{week:02d}", count) for (year, week), count in weekly_load.items()
         )
-        fig2.update_layout(xaxis_tickmode='linear')
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(_build_weekly_load_fig(weekly_counts), use_container_width=True)
     
     st.subheader("📅 Calendrier de charge")
     
-    df['date'] = pd.to_datetime(df['date_heure']).dt.date
-    daily_load = df.groupby('date').size().reset_index(name='count')
-    
-    date_range = pd.date_range(start=daily_load['date'].min(), 
-                              end=daily_load['date'].max())
-    daily_load = daily_load.set_index('date').reindex(date_range, fill_value=0).reset_index()
-    daily_load.columns = ['date', 'count']
-    
-    fig3 = px.density_heatmap(
-        daily_load,
-        x=daily_load['date'].dt.strftime('%A'),
-        y=daily_load['date'].dt.isocalendar().week,
-        z='count',
-        color_continuous_scale='Viridis',
-        title="Charge d'examens par jour de la semaine"
-    )
+    fig3 = _build_load_heatmap_fig(df['date_heure'].to_numpy())
     st.plotly_chart(fig3, use_container_width=True)
 # أضف هذا الكود في student.py بعد دالة render_student_statistics
+# Pastille selon la priorité de la notification
+_PRIO_EMOJI = {1: '🔵', 2: '🟡', 3: '🔴'}
+
 def render_notifications(student_id: int):
     """
     Affiche les notifications et alertes pour l'étudiant
@@ -329,7 +455,7 @@ def render_notifications(student_id: int):
     if unread:
         st.write(f"**📬 Non lues ({len(unread)})**")
         for notif in unread:
-            with st.expander(f"{'🔴' if notif.get('priority', 1) == 3 else '🟡' if notif.get('priority', 1) == 2 else '🔵'} {notif.get('titre', 'Sans titre')}"):
+            with st.expander(f"{_PRIO_EMOJI.get(notif.get('priority', 1), '🔵')} {notif.get('titre', 'Sans titre')}"):
                 st.write(f"**Type:** {notif.get('type_notification', 'Non spécifié')}")
                 st.write(f"**Contenu:** {notif.get('contenu', '')}")
                 st.write(f"**Priorité:** {notif.get('priority', 1)}")
@@ -350,8 +476,8 @@ def render_notifications(student_id: int):
     # Bouton pour marquer toutes comme lues
     if unread:
         if st.button("📌 Marquer toutes comme lues", type="primary"):
-            for notif in unread:
-                if notif.get('id'):
-                    UserQueries.mark_notification_as_read(notif.get('id'))
+            UserQueries.mark_notifications_as_read(
+                [notif['id'] for notif in unread if notif.get('id')]
+            )
             st.success("✅ Toutes les notifications marquées comme lues")
             st.rerun()
\ No newline at end of file